@@ -1,8 +1,24 @@
+import os
+import uuid
 import streamlit as st
 import pandas as pd
-import yfinance as yf
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
+
+from sniper.cache import SymbolCache
+from sniper.charts import allocation_pie, correlation_heatmap
+from sniper.fetch import ChunkedFetcher
+from sniper.metrics import Metrics, RunRecorder
+from sniper.pipeline import DailyLevels
+from sniper.risk import BENCHMARK, VAR_LEVELS, RiskEngine
+from sniper.screener import RANKS, SIGNAL_NAMES, SignalIndex, parse_tickers
+from sniper.service import REFRESH_INTERVAL, MarketDataRefresher, MarketDataService
+from sniper.signals import PRB_TIERS, build_portfolio_frame, build_watchlist_frame, market_frame, portfolio_totals
+from sniper.store import HISTORY_DB, HistoryStore
+from sniper.styling import (
+    WATCH_PAGE_SIZE, WATCH_SORTS, filter_watchlist, page_count, page_slice, portfolio_column_config,
+    portfolio_view, sort_watchlist, watchlist_column_config, watchlist_view,
+)
 
 # --- 1. ตั้งค่าหน้าเว็บ ---
 st.set_page_config(page_title="Sniper Portfolio & Watchlist", page_icon="🔭", layout="wide")
@@ -67,14 +83,17 @@ if 'watchlist' not in st.session_state:
 if 'weekly_note' not in st.session_state:
     st.session_state.weekly_note = ""  # ใส่ค่าว่างไว้ก่อน เพื่อไม่ให้เกิด Error
 
+# 2.4 Session ID (ใช้รวม ticker ของทุก session ให้ background refresher)
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # --- 3. Sidebar Settings & Management ---
 with st.sidebar:
     st.header("💼 Wallet & Management")
-    # Default Cash for Sniper Port = 400
-    cash_balance_usd = st.number_input("Cash Flow ($)", value=400.00, step=10.0, format="%.2f")
-    
+    st.caption("Cash Flow อยู่ที่ส่วน Wallet บนหน้าหลัก (แก้แล้ว rerun เฉพาะ metrics + pie)")
+
     st.divider()
-    
+
     tab_add, tab_remove = st.tabs(["➕ Add Asset", "🗑️ Remove/Sell"])
     
     with tab_add:
@@ -92,7 +111,6 @@ with st.sidebar:
                     if p_ticker in st.session_state.watchlist:
                         st.session_state.watchlist.remove(p_ticker)
                     st.success(f"Added {p_ticker}!")
-                    st.rerun()
 
         st.subheader("Add to Watchlist")
         with st.form("add_watch"):
@@ -101,258 +119,304 @@ with st.sidebar:
                 if w_ticker and w_ticker not in st.session_state.watchlist:
                     st.session_state.watchlist.append(w_ticker)
                     st.success(f"Added {w_ticker}!")
-                    st.rerun()
+
+    # Remove ใช้ on_click: state เปลี่ยนก่อน script รัน จึงไม่ต้อง st.rerun() ซ้ำอีกรอบ
+    def remove_position():
+        ticker_to_remove = st.session_state.remove_position.split(" ")[0]
+        st.session_state.portfolio = [x for x in st.session_state.portfolio if x['Ticker'] != ticker_to_remove]
+        st.toast(f"Removed {ticker_to_remove} from Portfolio.")
+
+    def remove_watch():
+        st.session_state.watchlist.remove(st.session_state.remove_watch)
+        st.toast(f"Removed {st.session_state.remove_watch}.")
 
     with tab_remove:
         st.subheader("Sell / Remove Position")
         current_holdings = [f"{item['Ticker']} ({item['Category']})" for item in st.session_state.portfolio]
         if current_holdings:
-            to_remove = st.selectbox("Select Position to Remove", current_holdings)
-            if st.button("🗑️ Confirm Remove Position"):
-                ticker_to_remove = to_remove.split(" ")[0]
-                st.session_state.portfolio = [x for x in st.session_state.portfolio if x['Ticker'] != ticker_to_remove]
-                st.warning(f"Removed {ticker_to_remove} from Portfolio.")
-                st.rerun()
+            st.selectbox("Select Position to Remove", current_holdings, key="remove_position")
+            st.button("🗑️ Confirm Remove Position", on_click=remove_position)
         else:
             st.info("Portfolio is empty.")
 
         st.divider()
         st.subheader("Remove from Watchlist")
         if st.session_state.watchlist:
-            w_remove = st.selectbox("Select Ticker", st.session_state.watchlist)
-            if st.button("🗑️ Confirm Remove Watchlist"):
-                st.session_state.watchlist.remove(w_remove)
-                st.warning(f"Removed {w_remove}.")
-                st.rerun()
+            st.selectbox("Select Ticker", st.session_state.watchlist, key="remove_watch")
+            st.button("🗑️ Confirm Remove Watchlist", on_click=remove_watch)
 
 # --- 4. PRB Tier Mapping ---
-prb_tiers = {
-    "NVDA": "S+", "AAPL": "S+", "MSFT": "S+", "GOOGL": "S+", "TSM": "S+", "ASML": "S+",
-    "AMD": "S", "PLTR": "S", "AMZN": "S", "META": "S", "AVGO": "S", "CRWD": "S", "SMH": "S", "QQQ": "ETF",
-    "TSLA": "A+", "V": "A+", "MA": "A+", "LLY": "A+", "JNJ": "A+", "BRK.B": "A+", "PG": "B+", "KO": "B+",
-    "NFLX": "A", "WM": "A", "WMT": "A", "CEG": "A", "NET": "A", "PANW": "A", "SCHD": "A", "CDNS": "S",
-    "ISRG": "B+", "RKLB": "B+", "TMDX": "B+", "IREN": "B+", "MELI": "B+", "ASTS": "B+", "EOSE": "B+",
-    "ADBE": "B", "UBER": "B", "HOOD": "B", "DASH": "B", "BABA": "B", "CRWV": "B", "MU": "B", "PATH": "C",
-    "TTD": "C", "LULU": "C", "CMG": "C", "DUOL": "C", "PDD": "C", "ORCL": "C", "WBD": "Hold",
-    "VOO": "ETF", "QQQM": "ETF"
-}
+prb_tiers = PRB_TIERS
 
 # --- 5. Data Fetching ---
-try:
-    now = datetime.utcnow() + timedelta(hours=7) 
-    target_date_str = now.strftime("%d %B %Y %H:%M:%S")
+# Process-wide singletons (shared by every session); the engine itself lives in the sniper package
+@st.cache_resource
+def get_fetcher():
+    return ChunkedFetcher()
+
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore(HISTORY_DB, download=get_fetcher().download)
+
+
+@st.cache_resource
+def get_symbol_cache():
+    return SymbolCache()
+
+
+@st.cache_resource
+def get_market_service():
+    return MarketDataService(DailyLevels(get_history_store()), get_symbol_cache())
+
+
+@st.cache_resource
+def get_refresher():
+    return MarketDataRefresher(get_market_service().get)
+
+
+@st.cache_resource
+def get_risk_engine():
+    return RiskEngine(get_market_service().levels.closes, BENCHMARK)
 
+
+@st.cache_resource
+def get_signal_index():
+    return SignalIndex(PRB_TIERS)
+
+
+@st.cache_resource
+def get_metrics():
+    return Metrics()
+
+
+def collect_counters():
+    cache, service, fetcher = get_symbol_cache(), get_market_service(), get_fetcher()
+    closes = service.levels.closes.footprint()
+    return {
+        "cache_hits": cache.hits, "cache_misses": cache.misses,
+        "upstream_fetches": service.fetches, "coalesced_requests": service.coalesced,
+        "coalesced_symbols": service.coalesced_symbols,
+        "chunk_requests": fetcher.requests, "chunk_retries": fetcher.retried, "chunk_throttled": fetcher.throttled,
+        "close_store_evictions": closes["evictions"], "close_store_reloads": closes["loads"],
+    }
+
+
+def collect_gauges():
+    # Point-in-time values: exported as Prometheus gauges, never as _total counters
+    closes = get_market_service().levels.closes.footprint()
+    return {
+        "open_breakers": len(get_fetcher().breaker.open_symbols()),
+        "close_store_bytes": closes["bytes"], "close_store_symbols": closes["symbols"],
+    }
+
+
+# Session memo: intermediate frames keyed on their actual inputs. Market records are compared by
+# identity, a refresh publishes new record objects so "same object" means "same data".
+def memoized(name, key, records, build):
+    hit = st.session_state.get(name)
+    if hit and hit[0] == key and len(hit[1]) == len(records) and all(a is b for a, b in zip(hit[1], records)):
+        return hit[2]
+    value = build()
+    st.session_state[name] = (key, tuple(records), value)
+    return value
+
+
+def watchlist_frame(watchlist, market_data, market_df):
+    # Row-level memo: only tickers that are new or whose record changed are rebuilt
+    tickers = sorted(set(watchlist))
+    memo = st.session_state.get("memo_watch")
+    seen = memo["seen"] if memo else {}
+    stale = [t for t in tickers if t not in seen or seen[t] is not market_data.get(t)]
+    if memo and not stale and memo["tickers"] == tickers:
+        return memo["sorted"]
+    if not tickers:
+        return pd.DataFrame()
+
+    stale_set = set(stale)
+    keep = [t for t in tickers if t not in stale_set]
+    parts = [memo["rows"].loc[keep]] if keep else []
+    if stale:
+        parts.append(build_watchlist_frame(stale, market_df, prb_tiers).set_index("Ticker", drop=False))
+    rows = pd.concat(parts).loc[tickers]
+    df_watch = rows.reset_index(drop=True).sort_values(by=["Signal", "Diff S1"], ascending=[True, True])
+    st.session_state.memo_watch = {
+        "tickers": tickers, "rows": rows, "sorted": df_watch,
+        "seen": {t: market_data.get(t) for t in tickers},
+    }
+    return df_watch
+
+
+perf = RunRecorder(get_metrics())
+
+
+@contextmanager
+def fragment_perf():
+    # Full run: spans go to this run's recorder. A fragment rerun skips section 9, where that
+    # recorder already finished, so it records and exports its own run.
+    if not perf.finished:
+        yield perf
+        return
+    recorder = RunRecorder(get_metrics())
+    try:
+        yield recorder
+    finally:
+        recorder.finish(collect_counters(), collect_gauges(), session=st.session_state.session_id)
+
+
+try:
     port_tickers = [item['Ticker'] for item in st.session_state.portfolio]
     watchlist_tickers = st.session_state.watchlist
-    all_tickers = list(set(port_tickers + watchlist_tickers))
-
-    @st.cache_data(ttl=60, show_spinner="Fetching Real-time Market Data...") 
-    def get_realtime_data(tickers_list):
-        data_dict = {}
-        try:
-            if not tickers_list: return {}
-            df_hist = yf.download(tickers_list, period="2y", group_by='ticker', auto_adjust=True, threads=True)
-        except Exception as e:
-            return {}
-
-        for ticker in tickers_list:
-            try:
-                if len(tickers_list) > 1:
-                    df_t = df_hist[ticker].copy()
-                else:
-                    df_t = df_hist.copy()
-
-                df_t = df_t.dropna()
-                if df_t.empty or len(df_t) < 200:
-                    data_dict[ticker] = {"Price": 0, "PrevClose": 0, "EMA50": 0, "EMA200": 0, "RSI": 50, "Sell1": 0, "Sell2": 0}
-                    continue
-
-                current_price = df_t['Close'].iloc[-1]
-                prev_close = df_t['Close'].iloc[-2]
-                
-                df_t['EMA50'] = df_t['Close'].ewm(span=50, adjust=False).mean()
-                df_t['EMA200'] = df_t['Close'].ewm(span=200, adjust=False).mean()
-                
-                delta = df_t['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                df_t['RSI'] = 100 - (100 / (1 + rs))
-
-                df_t['SMA20'] = df_t['Close'].rolling(window=20).mean()
-                df_t['STD20'] = df_t['Close'].rolling(window=20).std()
-                sell_r1 = (df_t['SMA20'] + (df_t['STD20'] * 2)).iloc[-1] 
-                sell_r2 = df_t['Close'].iloc[-252:].max()
-
-                data_dict[ticker] = {
-                    "Price": current_price, "PrevClose": prev_close,
-                    "EMA50": df_t['EMA50'].iloc[-1], "EMA200": df_t['EMA200'].iloc[-1], 
-                    "RSI": df_t['RSI'].iloc[-1], "Sell1": sell_r1, "Sell2": sell_r2
-                }
-            except:
-                data_dict[ticker] = {"Price": 0, "PrevClose": 0, "EMA50": 0, "EMA200": 0, "RSI": 50, "Sell1": 0, "Sell2": 0}
-                
-        return data_dict
+    # VOO rides along in the daily universe so beta never needs its own fetch
+    all_tickers = sorted(set(port_tickers + watchlist_tickers + [BENCHMARK]))
 
-    if st.button('🔄 Refresh Data (Real-time)'):
-        st.cache_data.clear()
-        st.rerun()
+    refresher = get_refresher()
+    refresher.register(st.session_state.session_id, all_tickers)
 
-    market_data = get_realtime_data(all_tickers)
+    if st.button('🔄 Refresh Data (Real-time)'):
+        refresher.revalidate()
+        st.toast("Refreshing market data in the background...")
+
+    # Stale-while-revalidate: render the latest snapshot, block only for tickers it has never seen
+    with perf.span("fetch"):
+        snapshot = refresher.snapshot()
+        missing = [t for t in all_tickers if t not in snapshot.data]
+        if missing:
+            with st.spinner("Fetching Real-time Market Data..."):
+                snapshot = refresher.refresh(missing)
+        market_data = snapshot.data
+
+    svc_stats = get_market_service().stats()
+    closes = get_market_service().levels.closes.footprint()
+    st.sidebar.caption(
+        f"📡 Upstream fetches: {svc_stats['fetches']} | Coalesced: {svc_stats['coalesced']} requests "
+        f"({svc_stats['coalesced_symbols']} symbols) | 🧠 Close store: {closes['bytes'] / 2**20:.1f} / "
+        f"{closes['budget'] / 2**20:.0f} MiB, {closes['symbols']} symbols"
+    )
+
+    updated_at = datetime.utcfromtimestamp(snapshot.fetched_at) + timedelta(hours=7)
+    target_date_str = updated_at.strftime("%d %B %Y %H:%M:%S")
 
     # --- 6. Data Processing ---
-    df = pd.DataFrame(st.session_state.portfolio)
-    
-    if not df.empty:
-        df['Current Price'] = df['Ticker'].apply(lambda x: market_data.get(x, {}).get('Price', 0))
-        df['PrevClose'] = df['Ticker'].apply(lambda x: market_data.get(x, {}).get('PrevClose', 0))
-        
-        df['Value USD'] = df['Qty'] * df['Current Price']
-        df['Total Cost'] = df['Qty'] * df['Avg Cost']
-        df['Total Gain USD'] = df['Value USD'] - df['Total Cost']
-        df['% P/L'] = ((df['Current Price'] - df['Avg Cost']) / df['Avg Cost']) 
-        df['Day Change USD'] = (df['Current Price'] - df['PrevClose']) * df['Qty']
-        df['%Day Change'] = ((df['Current Price'] - df['PrevClose']) / df['PrevClose']) if df['PrevClose'].sum() > 0 else 0
-
-        def get_levels_series(ticker, price):
-            data = market_data.get(ticker, {})
-            buy1 = data.get('EMA50', 0)
-            buy2 = data.get('EMA200', 0)
-            sell1 = data.get('Sell1', 0)
-            sell2 = data.get('Sell2', 0)
-            
-            diff_s1 = (price - buy1) / buy1 if buy1 > 0 else 0
-            upside = (sell1 - price) / price if price > 0 else 0
-            
-            return pd.Series([buy1, buy2, sell1, sell2, diff_s1, upside], 
-                            index=['Buy Lv.1', 'Buy Lv.2', 'Sell Lv.1', 'Sell Lv.2', 'Diff S1', 'Upside'])
-
-        tech_cols = df.apply(lambda x: get_levels_series(x['Ticker'], x['Current Price']), axis=1)
-        df = pd.concat([df, tech_cols], axis=1)
-
-        total_value = df['Value USD'].sum() + cash_balance_usd
-        total_gain = df['Total Gain USD'].sum()
-        total_day_change = df['Day Change USD'].sum()
-        total_invested = df['Total Cost'].sum()
-    else:
-        total_value = cash_balance_usd
-        total_gain = 0
-        total_day_change = 0
-        total_invested = 0
-
-    # --- 7. Styling Functions ---
-    def color_text(val):
-        if isinstance(val, (int, float)): return 'color: #28a745' if val >= 0 else 'color: #dc3545'
-        return ''
-    
-    def color_diff_s1_logic(val):
-        if isinstance(val, (int, float)):
-            if val < 0: return 'color: #28a745; font-weight: bold;' 
-            elif 0 <= val <= 0.02: return 'color: #90EE90;' 
-            else: return 'color: #dc3545;' 
-        return ''
-
-    def color_rsi(val):
-        try:
-            v = float(val)
-            if v >= 70: return 'color: #dc3545; font-weight: bold;'
-            if v <= 30: return 'color: #28a745; font-weight: bold;'
-        except: pass
-        return ''
-
-    def format_arrow(val):
-        symbol = "⬆️" if val > 0 else "⬇️" if val < 0 else "➖"
-        return f"{val:+.2%} {symbol}"
-
-    def color_tier(val):
-        if val == "S+": return 'color: #ffd700; font-weight: bold;' 
-        if val == "S": return 'color: #c0c0c0; font-weight: bold;' 
-        if "A" in str(val): return 'color: #cd7f32; font-weight: bold;' 
-        return ''
-
-    def highlight_row(s):
-        try:
-            if "IN ZONE" in str(s['Signal']): return ['background-color: rgba(40, 167, 69, 0.4)'] * len(s)
-            elif "ALERT" in str(s['Signal']): return ['background-color: rgba(40, 167, 69, 0.2)'] * len(s)
-            elif "PROFIT" in str(s['Signal']): return ['background-color: rgba(220, 53, 69, 0.2)'] * len(s)
-        except: pass
-        return [''] * len(s)
+    # Memo ต่อ session: คำนวณใหม่เฉพาะเมื่อ input จริงเปลี่ยน (snapshot ใหม่ / position เปลี่ยน)
+    with perf.span("processing"):
+        market_df = memoized("memo_market", None, (market_data,), lambda: market_frame(market_data))
+        positions_key = tuple((p['Ticker'], p['Category'], p['Avg Cost'], p['Qty']) for p in st.session_state.portfolio)
+        df = memoized(
+            "memo_portfolio", positions_key, [market_data.get(t) for t in port_tickers],
+            lambda: build_portfolio_frame(st.session_state.portfolio, market_df)
+        )
 
     # --- 8. UI Display ---
     st.title("🔭 Sniper Portfolio & Watchlist") 
-    st.caption(f"Last Update (BKK Time): {target_date_str} | Data Source: Yahoo Finance")
+    st.caption(f"Last Update (BKK Time): {target_date_str} ({snapshot.age:.0f}s ago) | Data Source: Yahoo Finance")
 
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("💰 Total Value (USD)", f"${total_value:,.2f}", f"≈฿{total_value*33:,.0f}")
-    c2.metric("🌊 Cash Flow", f"${cash_balance_usd:,.2f}", "Ready to Sniper")
-    c3.metric("📈 Unrealized G/L", f"${total_gain:,.2f}", f"Invested: ${total_invested:,.0f}")
-    c4.metric("📅 Day Change", f"${total_day_change:+.2f}", f"{(total_day_change/total_invested*100) if total_invested else 0:+.2f}%")
+    @st.fragment
+    def notes_section():
+        # Save แก้แค่ expander นี้: on_click เขียน note ก่อน fragment rerun, toast วาดใน fragment เอง
+        def save_notes():
+            st.session_state.weekly_note = st.session_state.note_editor
+            st.session_state.notes_saved = True
 
-    st.markdown("---")
+        if st.session_state.pop("notes_saved", False):
+            st.toast("บันทึกข้อมูลเรียบร้อย!")
 
-    col_mid_left, col_mid_right = st.columns([2, 1])
-    with col_mid_left:
-        st.subheader("ℹ️ Info") 
-        with st.expander("🧠 Strategy: EMA Indicator & Diff S1 & RSI Coloring", expanded=False):
-            c1, c2, c3 = st.columns(3)
-            with c1:
-                st.markdown("""
-                **📊 EMA Indicator Levels (Real-time):**
-                * **Buy Lv.1 (EMA 50):** จุดเข้าซื้อตามเทรนด์ (Sniper Zone)
-                * **Buy Lv.2 (EMA 200):** จุดรับของถูก (Deep Value / Floor)
-                * **Sell Lv.1:** Upper Bollinger Band (แนวต้านระยะสั้น)
-                * **Sell Lv.2:** 52-Week High (จุดสูงสุดเดิม)
-                """)
-            with c2:
-                st.markdown("""
-                **🎯 วิธีอ่านค่า Diff S1 แบบ Sniper:**
-                * **ค่าติดลบ (< 0%):** ✅ **IN ZONE** (ของถูก) - **สีเขียวเข้ม**
-                * **ค่าบวกเล็กน้อย (0% ถึง +2.0%):** 🟢 **ALERT** (เตรียมยิง) - **สีเขียวอ่อน**
-                * **ค่าบวกเยอะๆ (> +2.0%):** ➖ **Wait** (แพงไป) - **สีแดง**
-                """)
-            with c3:
-                st.markdown("""
-                **🎨 RSI Coloring:**
-                * **< 30:** **สีเขียว** (Oversold / น่าซื้อ)
-                * **> 70:** **สีแดง** (Overbought / น่าขาย)
-                """)
-        
         with st.expander("📅 Weekly Analysis & Notes : https://web.facebook.com/chaodoi.diary : ปฏิทินข้อมูลเศรษฐกิจที่สำคัญและการรายงานผลประกอบการที่น่าสนใจในสัปดาห์นี้", expanded=True):
             tab_view, tab_edit = st.tabs(["👁️ View", "✏️ Edit"])
-            
+
             with tab_view:
                 st.markdown(st.session_state.weekly_note)
-            
+
             with tab_edit:
                 st.info("คุณสามารถแก้ไข เพิ่ม หรือลบข้อความวิเคราะห์ได้ที่นี่ครับ")
-                new_note = st.text_area("Note Editor:", value=st.session_state.weekly_note, height=250)
-                if st.button("💾 Save Notes"):
-                    st.session_state.weekly_note = new_note
-                    st.success("บันทึกข้อมูลเรียบร้อย!")
-                    st.rerun()
-
-    with col_mid_right:
-        st.subheader("📊 Asset Allocation (Including Cash)")
-        
-        if not df.empty:
-            labels = list(df['Ticker']) + ['CASH 💵']
-            values = list(df['Value USD']) + [cash_balance_usd]
-        else:
-            labels = ['CASH 💵']
-            values = [cash_balance_usd]
+                st.text_area("Note Editor:", value=st.session_state.weekly_note, height=250, key="note_editor")
+                st.button("💾 Save Notes", on_click=save_notes)
+
+    @st.fragment
+    def wallet_section(df):
+        # แก้ Cash Flow แล้ว rerun แค่ fragment นี้ (metrics + pie) ส่วน Info / Notes / ตารางไม่ถูกวาดใหม่
+        with fragment_perf() as recorder:
+            col_metrics, col_pie = st.columns([2, 1])
+            with col_metrics:
+                # Default Cash for Sniper Port = 400
+                cash_balance_usd = st.number_input("Cash Flow ($)", value=400.00, step=10.0, format="%.2f", key="cash_balance_usd")
+                totals = portfolio_totals(df, cash_balance_usd)
+                total_value, total_gain = totals["total_value"], totals["total_gain"]
+                total_day_change, total_invested = totals["total_day_change"], totals["total_invested"]
+
+                c1, c2 = st.columns(2)
+                c1.metric("💰 Total Value (USD)", f"${total_value:,.2f}", f"≈฿{total_value*33:,.0f}")
+                c2.metric("🌊 Cash Flow", f"${cash_balance_usd:,.2f}", "Ready to Sniper")
+                c3, c4 = st.columns(2)
+                c3.metric("📈 Unrealized G/L", f"${total_gain:,.2f}", f"Invested: ${total_invested:,.0f}")
+                c4.metric("📅 Day Change", f"${total_day_change:+.2f}", f"{(total_day_change/total_invested*100) if total_invested else 0:+.2f}%")
+
+            with col_pie:
+                st.subheader("📊 Asset Allocation (Including Cash)")
+                with recorder.span("chart.pie"):
+                    fig_pie = allocation_pie(df, cash_balance_usd, total_value)
+                    st.plotly_chart(fig_pie, use_container_width=True)
+
+    wallet_section(df)
+    st.markdown("---")
 
-        colors = ['#333333', '#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b', '#7f7f7f', '#bcbd22', '#17becf']
-        
-        fig_pie = go.Figure(data=[go.Pie(
-            labels=labels, values=values, hole=.5, marker_colors=colors, 
-            textinfo='label+percent', textposition='inside', textfont=dict(size=16, color='white')
-        )])
-        fig_pie.update_layout(
-            margin=dict(t=20, b=20, l=20, r=20), height=350, showlegend=True,
-            legend=dict(orientation="h", yanchor="top", y=-0.1, xanchor="center", x=0.5, font=dict(size=14)),
-            annotations=[dict(text=f'Total<br><b>${total_value:,.0f}</b>', x=0.5, y=0.5, font_size=24, showarrow=False)]
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+    st.subheader("ℹ️ Info") 
+    with st.expander("🧠 Strategy: EMA Indicator & Diff S1 & RSI Zones", expanded=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            st.markdown("""
+            **📊 EMA Indicator Levels (Real-time):**
+            * **Buy Lv.1 (EMA 50):** จุดเข้าซื้อตามเทรนด์ (Sniper Zone)
+            * **Buy Lv.2 (EMA 200):** จุดรับของถูก (Deep Value / Floor)
+            * **Sell Lv.1:** Upper Bollinger Band (แนวต้านระยะสั้น)
+            * **Sell Lv.2:** 52-Week High (จุดสูงสุดเดิม)
+            """)
+        with c2:
+            st.markdown("""
+            **🎯 วิธีอ่านค่า Diff S1 แบบ Sniper:**
+            * **ค่าติดลบ (< 0%):** ✅ **IN ZONE** (ของถูก)
+            * **ค่าบวกเล็กน้อย (0% ถึง +2.0%):** 🟢 **ALERT** (เตรียมยิง)
+            * **ค่าบวกเยอะๆ (> +2.0%):** ➖ **Wait** (แพงไป) - ตาราง Portfolio แสดงเป็น 🔴 หน้า Diff S1
+            * ⚪ **No Data:** ยังไม่มีราคา หรือประวัติราคาไม่ถึง 200 วัน
+            """)
+        with c3:
+            st.markdown("""
+            **🎯 RSI Zones (คอลัมน์ถัดจาก RSI):**
+            * **≤ 30:** 🟢 **OS** (Oversold / น่าซื้อ)
+            * **≥ 70:** 🔴 **OB** (Overbought / น่าขาย)
+            * ⬆️ / ⬇️ = % Day (Watchlist) หรือ % P/L (Portfolio) เป็นบวก / ลบ
+            """)
+    notes_section()
+
+    # --- 7. Risk Analytics (จาก daily history ที่มีอยู่แล้ว ไม่ดึงข้อมูลเพิ่ม) ---
+    with st.expander(f"📉 Risk & Equity Curve (stored daily history, beta vs {BENCHMARK})", expanded=False):
+        with perf.span("risk"):
+            report = get_risk_engine().report(st.session_state.portfolio)
+        if report is None:
+            st.info("Not enough stored history for the current holdings yet.")
+        else:
+            r1, r2, r3, r4, r5 = st.columns(5)
+            r1.metric("Volatility (ann.)", f"{report.volatility:.1%}")
+            r2.metric("Max Drawdown", f"{report.max_drawdown:.1%}")
+            for col, level in zip((r3, r4), VAR_LEVELS):
+                col.metric(f"VaR {level:.0%} (1 day)", f"${report.var[level]:,.2f}")
+            r5.metric(f"Beta vs {BENCHMARK}", f"{report.beta:.2f}")
+
+            risk_left, risk_right = st.columns([3, 2])
+            with risk_left:
+                st.caption(f"Current holdings replayed over the last {report.bars} bars")
+                st.line_chart(report.equity, height=300)
+            with risk_right:
+                st.dataframe(
+                    report.positions.assign(Weight=report.positions["Weight"] * 100, Volatility=report.positions["Volatility"] * 100),
+                    column_config={
+                        "Weight": st.column_config.NumberColumn("Weight", format="%.1f%%"),
+                        "Volatility": st.column_config.NumberColumn("Vol (ann.)", format="%.1f%%"),
+                        "Beta": st.column_config.NumberColumn(f"Beta ({BENCHMARK})", format="%.2f"),
+                    },
+                    use_container_width=True
+                )
+            st.plotly_chart(correlation_heatmap(report.corr), use_container_width=True)
 
     st.markdown("---")
 
@@ -360,116 +424,133 @@ try:
 
     # --- LEFT SIDE: Portfolio (Filtered by Category) ---
     with col_bot_left:
-        # Growth Engine
-        st.subheader("🚀 Growth Engine") 
-        if not df.empty:
-            df_growth = df[df['Category'] == 'Growth'].copy()
-            st.dataframe(
-                df_growth.style.format({
-                    "Qty": "{:.4f}", "Avg Cost": "${:.2f}", "Total Cost": "${:,.2f}", "Current Price": "${:.2f}",
-                    "Diff S1": "{:+.1%}", "% P/L": format_arrow, "Value USD": "${:,.2f}", "Total Gain USD": "${:,.2f}",
-                    "Upside": "{:+.1%}", "Buy Lv.1": "${:.0f}", "Sell Lv.1": "${:.0f}"
-                })
-                .map(color_text, subset=['% P/L', 'Total Gain USD', 'Upside'])
-                .map(color_diff_s1_logic, subset=['Diff S1']),
-                column_order=["Ticker", "Qty", "Avg Cost", "Current Price", "% P/L", "Value USD", "Total Gain USD", "Upside", "Diff S1", "Buy Lv.1", "Sell Lv.1"],
-                column_config={
-                    "Current Price": "Price", "% P/L": "% Total", "Value USD": "Value ($)", "Total Gain USD": "Total Gain ($)",
-                    "Buy Lv.1": "Buy Lv.1", "Sell Lv.1": "Sell Lv.1", "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1")
-                },
-                hide_index=True, use_container_width=True
-            )
-        else:
-            st.info("No Growth stocks.")
-
-        # Defensive Wall
-        st.subheader("🛡️ Defensive Wall") 
-        if not df.empty:
-            df_defensive = df[df['Category'] == 'Defensive'].copy()
-            st.dataframe(
-                df_defensive.style.format({
-                    "Qty": "{:.4f}", "Avg Cost": "${:.2f}", "Total Cost": "${:,.2f}", "Current Price": "${:.2f}",
-                    "Diff S1": "{:+.1%}", "% P/L": format_arrow, "Value USD": "${:,.2f}", "Total Gain USD": "${:,.2f}",
-                    "Upside": "{:+.1%}", "Buy Lv.1": "${:.0f}", "Sell Lv.1": "${:.0f}"
-                })
-                .map(color_text, subset=['% P/L', 'Total Gain USD', 'Upside'])
-                .map(color_diff_s1_logic, subset=['Diff S1']),
-                column_order=["Ticker", "Qty", "Avg Cost", "Current Price", "% P/L", "Value USD", "Total Gain USD", "Upside", "Diff S1", "Buy Lv.1", "Sell Lv.1"],
-                column_config={
-                    "Current Price": "Price", "% P/L": "% Total", "Value USD": "Value ($)", "Total Gain USD": "Total Gain ($)",
-                    "Buy Lv.1": "Buy Lv.1", "Sell Lv.1": "Sell Lv.1", "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1")
-                },
-                hide_index=True, use_container_width=True
-            )
-        else:
-            st.info("No Defensive stocks.")
+        # Growth Engine / Defensive Wall ใช้ column config ชุดเดียวกัน
+        portfolio_config = portfolio_column_config()
+        for title, category, span in (("🚀 Growth Engine", "Growth", "table.growth"), ("🛡️ Defensive Wall", "Defensive", "table.defensive")):
+            st.subheader(title)
+            if not df.empty:
+                with perf.span(span):
+                    st.dataframe(
+                        portfolio_view(df[df['Category'] == category]),
+                        column_config=portfolio_config, hide_index=True, use_container_width=True
+                    )
+            else:
+                st.info(f"No {category} stocks.")
 
     # --- RIGHT SIDE: Watchlist ---
+    @st.fragment
+    def watchlist_section(df_watch):
+        # Filter / sort / page rerun แค่ fragment นี้ และส่งไป browser ทีละหน้า (render time คงที่)
+        with fragment_perf() as recorder:
+            if len(df_watch) > WATCH_PAGE_SIZE:
+                f1, f2, f3 = st.columns([1, 2, 1])
+                query = f1.text_input("🔎 Ticker", key="watch_query")
+                options = df_watch.drop_duplicates("Signal").sort_values("Signal")["Display Signal"].tolist()
+                signals = f2.multiselect("Signal", options, key="watch_signals")
+                sort_by = f3.selectbox("Sort by", list(WATCH_SORTS), key="watch_sort")
+                df_watch = sort_watchlist(filter_watchlist(df_watch, query, signals), sort_by)
+
+                pages = page_count(len(df_watch))
+                if st.session_state.get("watch_page", 1) > pages:
+                    st.session_state.watch_page = pages
+                page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, step=1, key="watch_page")
+                st.caption(f"{len(df_watch):,} symbols | showing {WATCH_PAGE_SIZE} per page")
+                df_watch = page_slice(df_watch, page)
+
+            with recorder.span("table.watchlist"):
+                st.dataframe(
+                    watchlist_view(df_watch),
+                    column_config=watchlist_column_config(), hide_index=True, use_container_width=True
+                )
+
     with col_bot_right:
         st.subheader("🎯 Sniper Watchlist (Fractional Unlocked)")
         
-        watchlist_data = []
-        for t in sorted(list(set(st.session_state.watchlist))): 
-            data = market_data.get(t, {})
-            price = data.get('Price', 0)
-            prev = data.get('PrevClose', 0)
-            pct_change = (price - prev) / prev if prev > 0 else 0
-            
-            buy1 = data.get('EMA50', 0)
-            sell1 = data.get('Sell1', 0)
-            rsi = data.get('RSI', 50)
-            
-            diff_s1 = (price - buy1)/buy1 if buy1 > 0 else 9.99
-            upside = (sell1 - price)/price if price > 0 else 0
-            
-            signal = "4. Wait" 
-            if diff_s1 < 0 and price > 0: signal = "1. ✅ IN ZONE"
-            elif 0 <= diff_s1 <= 0.02 and price > 0: signal = "2. 🟢 ALERT"
-            elif price >= sell1: signal = "5. 🔴 PROFIT"
-            else: signal = "3. ➖ Wait"
-            
-            watchlist_data.append({
-                "Tier": prb_tiers.get(t, "-"), "Ticker": t, "Price": price, "% Day": pct_change, "Signal": signal, 
-                "Diff S1": diff_s1, "RSI": rsi, "Upside": upside,
-                "Buy Lv.1": data.get('EMA50', 0), "Buy Lv.2": data.get('EMA200', 0), 
-                "Sell Lv.1": data.get('Sell1', 0), "Sell Lv.2": data.get('Sell2', 0),
-                "Display Signal": signal.split(". ")[1] 
-            })
-        
-        df_watch = pd.DataFrame(watchlist_data)
+        with perf.span("processing.watchlist"):
+            df_watch = watchlist_frame(st.session_state.watchlist, market_data, market_df)
         if not df_watch.empty:
-            df_watch = df_watch.sort_values(by=["Signal", "Diff S1"], ascending=[True, True])
-
-            st.dataframe(
-                df_watch.style.format({
-                    "Price": "${:.2f}", "% Day": format_arrow, "Diff S1": "{:+.1%}", "RSI": "{:.0f}", "Upside": "{:+.1%}",
-                    "Buy Lv.1": "${:.0f}", "Buy Lv.2": "${:.0f}", "Sell Lv.1": "${:.0f}", "Sell Lv.2": "${:.0f}"
-                })
-                .apply(highlight_row, axis=1)
-                .map(color_diff_s1_logic, subset=['Diff S1'])
-                .map(color_tier, subset=['Tier'])
-                .map(color_rsi, subset=['RSI'])
-                .map(color_text, subset=['Upside']), 
-                column_config={
-                    "Display Signal": st.column_config.Column("Status", width="medium"),
-                    "Tier": st.column_config.Column("Tier", width="small"),
-                    "Ticker": st.column_config.Column("Symbol", width="small"),
-                    "Price": st.column_config.Column("Price", width="small"),
-                    "% Day": st.column_config.Column("% Day", width="small"),
-                    "Diff S1": st.column_config.Column("Diff S1", help="Distance to EMA 50"),
-                    "Upside": st.column_config.Column("Upside", help="Gap to Sell Lv.1"),
-                    "RSI": st.column_config.Column("RSI", help="RSI (14)"),
-                    "Buy Lv.1": st.column_config.Column("Buy (EMA50)"),
-                    "Buy Lv.2": st.column_config.Column("Buy (EMA200)"),
-                    "Sell Lv.1": st.column_config.Column("Sell (R1)"),
-                    "Sell Lv.2": st.column_config.Column("Sell (R2)"),
-                },
-                column_order=["Display Signal", "Tier", "Ticker", "Price", "% Day", "Upside", "Diff S1", "RSI", "Buy Lv.1", "Buy Lv.2", "Sell Lv.1", "Sell Lv.2"],
-                hide_index=True, use_container_width=True
-            )
+            watchlist_section(df_watch)
         else:
             st.info("Watchlist is empty.")
 
+    # --- 10. Universe Screener (กฎ Sniper เดียวกัน แต่สแกนทั้ง universe) ---
+    @st.fragment(run_every=REFRESH_INTERVAL)
+    def screener_section():
+        # Scan / filter rerun only this fragment; the index is shared and rebuilds only rows whose levels moved.
+        # The scanned universe rides along with the background refresher, every snapshot is re-applied here.
+        with fragment_perf() as recorder:
+            index, refresher = get_signal_index(), get_refresher()
+            u1, u2 = st.columns([1, 3])
+            source = u1.radio("Universe", ["PRB Tiers", "Custom list"], key="screen_source")
+            text = u2.text_area("Tickers (comma / space / newline)", height=100, key="screen_text", disabled=source == "PRB Tiers")
+            f1, f2, f3, f4 = st.columns(4)
+            tiers = f1.multiselect("Tier", sorted(set(prb_tiers.values())), key="screen_tiers")
+            signals = f2.multiselect("Signal", SIGNAL_NAMES, default=["IN ZONE", "ALERT"], key="screen_signals")
+            rank_by = f3.selectbox("Rank by", list(RANKS), key="screen_rank")
+            top = f4.number_input("Top N", min_value=5, max_value=500, value=25, step=5, key="screen_top")
+
+            universe = list(prb_tiers) if source == "PRB Tiers" else parse_tickers(text)
+            clicked = st.button(f"🛰️ Scan {len(universe):,} symbols", disabled=not universe, key="screen_run")
+            if clicked:
+                with st.spinner(f"Scanning {len(universe):,} symbols..."), recorder.span("screener.scan"):
+                    missing = [t for t in universe if t not in refresher.snapshot().data]
+                    if missing:
+                        refresher.refresh(missing)  # block only for symbols no snapshot has seen yet
+                st.session_state.screen_universe = universe
+                st.session_state.screen_version = None
+
+            scanned = st.session_state.get("screen_universe")
+            if scanned:
+                refresher.register(f"{st.session_state.session_id}:screener", scanned)
+                snapshot = refresher.snapshot()
+                if st.session_state.get("screen_version") != snapshot.version:
+                    with recorder.span("screener.update"):
+                        changed = index.update({t: snapshot.data[t] for t in scanned if t in snapshot.data})
+                    st.session_state.screen_version = snapshot.version
+                    st.session_state.screen_changed = len(changed)
+                if clicked:
+                    st.toast(f"Screened {len(scanned):,} symbols ({st.session_state.screen_changed:,} rows rebuilt)")
+
+                result = index.scan(scanned, tiers, signals, rank_by, int(top))
+                st.caption(
+                    f"{len(result)} candidates from {len(scanned):,} symbols | ranked by {rank_by} | "
+                    f"snapshot {snapshot.age:.0f}s old, {st.session_state.screen_changed:,} rows rebuilt on its last update"
+                )
+                st.dataframe(
+                    watchlist_view(result),
+                    column_config=watchlist_column_config(), hide_index=True, use_container_width=True
+                )
+
+    st.markdown("---")
+    st.subheader("🛰️ Universe Screener")
+    screener_section()
+
 except Exception as e:
     st.error(f"System Error: {e}")
 
+# --- 9. Perf Instrumentation (เปิด panel ด้วย ?perf=1 หรือ SNIPER_PERF_PANEL=1) ---
+counters, gauges = collect_counters(), collect_gauges()
+perf.finish(counters, gauges, session=st.session_state.session_id)
+if os.environ.get("SNIPER_PERF_PANEL") == "1" or st.query_params.get("perf") == "1":
+    with st.sidebar:
+        st.divider()
+        if st.toggle("⏱️ Perf panel", value=True):
+            previous = st.session_state.get("perf_counters", counters)
+            st.caption(f"This rerun: {sum(perf.spans.values()) * 1000:,.0f} ms in timed stages")
+            st.dataframe(
+                pd.DataFrame({"ms": {k: v * 1000 for k, v in perf.spans.items()}}).round(1),
+                use_container_width=True
+            )
+            stages = get_metrics().stages
+            st.dataframe(
+                pd.DataFrame(
+                    {k: {"runs": c, "avg ms": s / c * 1000, "max ms": m * 1000} for k, (c, s, m) in stages.items()}
+                ).T.round(1),
+                use_container_width=True
+            )
+            st.dataframe(
+                pd.DataFrame({"total": counters, "Δ since last rerun": {k: v - previous.get(k, 0) for k, v in counters.items()}}),
+                use_container_width=True
+            )
+            st.dataframe(pd.DataFrame({"now": gauges}), use_container_width=True)
+    st.session_state.perf_counters = counters
@@ -0,0 +1,65 @@
+"""Offline stand-in for yf.download: replays recorded or synthetic daily OHLCV."""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def synthetic_bars(tickers, days=520, seed=7, end=None):
+    # Geometric random walk per ticker, business-day calendar ending today
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=end or pd.Timestamp.today().normalize(), periods=days, name="Date")
+    returns = rng.normal(0.0004, 0.02, size=(days, len(tickers)))
+    close = 100 * rng.uniform(0.2, 5.0, size=len(tickers)) * np.exp(np.cumsum(returns, axis=0))
+    bars = {}
+    for i, t in enumerate(tickers):
+        c = close[:, i]
+        bars[t] = pd.DataFrame({
+            "Open": c * 0.995, "High": c * 1.01, "Low": c * 0.99, "Close": c,
+            "Volume": rng.integers(10_000, 5_000_000, size=days).astype(float),
+        }, index=index)
+    return bars
+
+
+def load_recorded(directory):
+    # One <TICKER>.csv per symbol, as written by record()
+    return {
+        os.path.splitext(os.path.basename(path))[0]: pd.read_csv(path, index_col=0, parse_dates=True)
+        for path in sorted(glob.glob(os.path.join(directory, "*.csv")))
+    }
+
+
+def record(tickers, directory, period="2y"):
+    # Snapshot real Yahoo bars once so later runs can replay them offline
+    from sniper.fetch import split_download, yf_download
+
+    os.makedirs(directory, exist_ok=True)
+    df = yf_download(list(tickers), period=period, group_by='ticker', auto_adjust=True, progress=False)
+    for t, df_t in split_download(df, list(tickers)).items():
+        df_t.reindex(columns=FIELDS).dropna(subset=["Close"]).to_csv(os.path.join(directory, f"{t}.csv"))
+
+
+class FixtureDownloader:
+    # Call-compatible with yf.download for the arguments the app uses (period / start, group_by='ticker')
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = 0
+
+    def __call__(self, tickers, start=None, period=None, **kwargs):
+        self.calls += 1
+        frames = {}
+        for t in tickers:
+            df = self.bars.get(t)
+            if df is None:
+                continue
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            elif period and period.endswith("d"):
+                df = df.iloc[-int(period[:-1]):]
+            frames[t] = df
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
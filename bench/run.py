@@ -0,0 +1,206 @@
+"""Offline render-path benchmark over fixture market data.
+
+    python -m bench.run run --sizes 10 100 1000 5000 --out bench_output.json
+    python -m bench.run run --fixtures bench/recorded --sizes 100
+    python -m bench.run compare before.json after.json
+    python -m bench.run record bench/recorded AAPL MSFT NVDA ...
+
+Each stage is timed on its own (median / min over --repeat runs), then run once more under
+tracemalloc for its peak Python allocation. Results are JSON so runs can be diffed across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from sniper.cache import SymbolCache
+from sniper.charts import allocation_pie
+from sniper.fetch import ChunkedFetcher
+from sniper.indicators import compute_indicators
+from sniper.pipeline import DailyLevels
+from sniper.service import MarketDataService
+from sniper.signals import build_portfolio_frame, build_watchlist_frame, market_frame, portfolio_totals
+from sniper.store import HistoryStore
+from sniper.styling import page_slice, portfolio_view, sort_watchlist, watchlist_view
+
+from .fixtures import FixtureDownloader, load_recorded, record, synthetic_bars
+
+CASH = 400.0
+
+
+class Context:
+    def __init__(self, tickers, downloader, workdir):
+        self.tickers = tickers
+        self.downloader = downloader
+        self.workdir = workdir
+        self.positions = [
+            {"Ticker": t, "Category": "Growth" if i % 2 else "Defensive", "Avg Cost": 100.0, "Qty": 1.0}
+            for i, t in enumerate(tickers)
+        ]
+
+
+# Stages run in this order; each one may use what the previous stages left on the context
+def stage_fetch_cold(ctx):
+    # First page load: history backfill into an empty store + quotes + streaming levels
+    fetcher = ChunkedFetcher(ctx.downloader, rate=1e9, sleep=lambda s: None)
+    ctx.store = HistoryStore(os.path.join(ctx.workdir, f"{uuid.uuid4().hex}.sqlite"), download=fetcher.download)
+    ctx.service = MarketDataService(DailyLevels(ctx.store), SymbolCache())
+    ctx.market_data = ctx.service.get(ctx.tickers)
+
+
+def stage_fetch_warm(ctx):
+    # The periodic refresh: history already synced today, only the quote path runs
+    ctx.service.cache.clear()
+    ctx.market_data = ctx.service.get(ctx.tickers)
+
+
+def stage_indicators(ctx):
+    compute_indicators(ctx.store.load_close(ctx.tickers))
+
+
+def stage_processing(ctx):
+    market_df = market_frame(ctx.market_data)
+    ctx.df = build_portfolio_frame(ctx.positions, market_df)
+    ctx.df_watch = build_watchlist_frame(ctx.tickers, market_df).sort_values(by=["Signal", "Diff S1"])
+    ctx.totals = portfolio_totals(ctx.df, CASH)
+
+
+def stage_tables(ctx):
+    # What st.dataframe ships: the display views as arrow bytes (watchlist: server-side sort + first page)
+    from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+
+    for category in ("Growth", "Defensive"):
+        convert_pandas_df_to_arrow_bytes(portfolio_view(ctx.df[ctx.df['Category'] == category]))
+    convert_pandas_df_to_arrow_bytes(watchlist_view(page_slice(sort_watchlist(ctx.df_watch, "Upside"), 1)))
+
+
+def stage_chart(ctx):
+    allocation_pie(ctx.df, CASH, ctx.totals["total_value"]).to_json()
+
+
+STAGES = [
+    ("fetch_cold", stage_fetch_cold), ("fetch_warm", stage_fetch_warm), ("indicators", stage_indicators),
+    ("processing", stage_processing), ("tables", stage_tables), ("chart", stage_chart),
+]
+
+
+def bench_size(tickers, downloader, repeat):
+    timings = {name: [] for name, _ in STAGES}
+    peaks = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(repeat):
+            ctx = Context(tickers, downloader, workdir)
+            for name, stage in STAGES:
+                start = time.perf_counter()
+                stage(ctx)
+                timings[name].append(time.perf_counter() - start)
+
+        ctx = Context(tickers, downloader, workdir)
+        tracemalloc.start()
+        try:
+            for name, stage in STAGES:
+                tracemalloc.reset_peak()
+                stage(ctx)
+                peaks[name] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        name: {"median_s": statistics.median(ts), "min_s": min(ts), "peak_bytes": peaks[name]}
+        for name, ts in timings.items()
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    if args.fixtures:
+        bars = load_recorded(args.fixtures)
+        if not bars:
+            raise SystemExit(f"No recorded fixtures in {args.fixtures}")
+    else:
+        bars = synthetic_bars([f"T{i:05d}" for i in range(max(args.sizes))], days=args.days, seed=args.seed)
+    universe = sorted(bars)
+    downloader = FixtureDownloader(bars)
+
+    results = {}
+    for size in args.sizes:
+        tickers = universe[:size]
+        if len(tickers) < size:
+            print(f"only {len(tickers)} fixture symbols available for size {size}", file=sys.stderr)
+        results[str(size)] = bench_size(tickers, downloader, args.repeat)
+        line = "  ".join(f"{name}={r['median_s'] * 1000:.1f}ms" for name, r in results[str(size)].items())
+        print(f"{size:>6} tickers  {line}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "fixtures": args.fixtures or f"synthetic(days={args.days}, seed={args.seed})", "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {args.out}", file=sys.stderr)
+
+
+def compare(args):
+    with open(args.before, encoding="utf-8") as fh:
+        before = json.load(fh)
+    with open(args.after, encoding="utf-8") as fh:
+        after = json.load(fh)
+    print(f"{'size':>6}  {'stage':<12} {'before':>10} {'after':>10} {'ratio':>7}  {'peak MiB':>9}")
+    for size, stages in after["results"].items():
+        for name, r in stages.items():
+            old = before["results"].get(size, {}).get(name)
+            ratio = f"{r['median_s'] / old['median_s']:.2f}x" if old and old["median_s"] else "-"
+            prev = f"{old['median_s'] * 1000:.1f}ms" if old else "-"
+            print(f"{size:>6}  {name:<12} {prev:>10} {r['median_s'] * 1000:>8.1f}ms {ratio:>7}  {r['peak_bytes'] / 2**20:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description="Sniper render-path benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="time every stage for each universe size")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--fixtures", help="directory of recorded <TICKER>.csv bars (default: synthetic)")
+    p.add_argument("--days", type=int, default=520, help="synthetic bars per ticker")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--out", default="bench_output.json")
+    p.set_defaults(func=run)
+
+    p = sub.add_parser("compare", help="stage-by-stage ratio between two result files")
+    p.add_argument("before")
+    p.add_argument("after")
+    p.set_defaults(func=compare)
+
+    p = sub.add_parser("record", help="save real Yahoo bars as replayable fixtures")
+    p.add_argument("directory")
+    p.add_argument("tickers", nargs="+")
+    p.set_defaults(func=lambda a: record(a.tickers, a.directory))
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
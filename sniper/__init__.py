@@ -0,0 +1 @@
+"""Sniper Portfolio compute core: market data, indicators, valuation and signals (no Streamlit)."""
@@ -0,0 +1,187 @@
+"""Headless alert daemon: poll quotes, re-score watchlists with the Sniper rules, push signal transitions.
+
+    python -m sniper alerts accounts.json --jsonl alerts.jsonl --webhook http://localhost:9000/hook
+
+Each cycle is one batched quote fetch + the O(1) streaming levels + the vectorized watchlist rules;
+only tickers whose signal changed are looked at one by one.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .signals import PRB_TIERS, build_watchlist_frame, market_frame
+
+log = logging.getLogger(__name__)
+
+ALERT_SIGNALS = ("IN ZONE", "PROFIT")
+POLL_INTERVAL = 5.0      # seconds between cycle starts
+LATENCY_BUDGET = 3.0     # a quote fetch slower than this is left running; the next cycle picks up its result
+ALERT_COOLDOWN = 30 * 60  # same ticker + signal is not re-sent inside this window
+
+
+class TransitionTracker:
+    # Last signal per ticker; emits only on a change into an alert signal, outside its cooldown
+    def __init__(self, signals=ALERT_SIGNALS, cooldown=ALERT_COOLDOWN, clock=time.time):
+        self.signals = set(signals)
+        self.cooldown = cooldown
+        self.clock = clock
+        self.last = {}  # ticker -> signal name
+        self.sent = {}  # (ticker, signal name) -> time of the last alert
+        self.suppressed = 0
+
+    def observe(self, rows):
+        # rows: build_watchlist_frame output; the first sighting of a ticker only sets its baseline
+        names = rows["Display Signal"].str.split(" ", n=1).str[1].to_numpy()
+        tickers = rows["Ticker"].to_numpy()
+        prev = np.array([self.last.get(t) for t in tickers], dtype=object)
+        seen = np.array([t in self.last for t in tickers], dtype=bool)
+        changed = np.flatnonzero(seen & (prev != names))
+        self.last.update(zip(tickers, names))
+
+        now, out = self.clock(), []
+        for i in changed:
+            key = (tickers[i], names[i])
+            if names[i] not in self.signals:
+                continue
+            if now - self.sent.get(key, -np.inf) < self.cooldown:
+                self.suppressed += 1
+                continue
+            self.sent[key] = now
+            row = rows.iloc[i]
+            out.append({
+                "ticker": tickers[i], "signal": row["Display Signal"], "previous": prev[i],
+                "price": float(row["Price"]), "diff_s1": float(row["Diff S1"]), "sell1": float(row["Sell Lv.1"]),
+                "rsi": float(row["RSI"]), "tier": row["Tier"],
+            })
+        return out
+
+
+# --- Sinks: anything with send(alerts) ---
+class JsonlSink:
+    def __init__(self, path):
+        self.path = path  # "-" for stdout
+        self._lock = threading.Lock()
+
+    def send(self, alerts):
+        lines = "".join(json.dumps(a, ensure_ascii=False) + "\n" for a in alerts)
+        with self._lock:
+            if self.path == "-":
+                sys.stdout.write(lines)
+                sys.stdout.flush()
+            else:
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(lines)
+
+
+class WebhookSink:
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        body = json.dumps({"alerts": alerts}, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class AlertDaemon:
+    def __init__(self, watchlists, source, levels, sinks, interval=POLL_INTERVAL, budget=LATENCY_BUDGET,
+                 tracker=None, tiers=PRB_TIERS):
+        self.watchlists = watchlists  # ticker -> accounts watching it
+        self.tickers = sorted(watchlists)
+        self.source = source          # tickers -> {ticker: (bar date, price)}, sync or async (pipeline.fetch_quotes)
+        self.levels = levels          # pipeline.DailyLevels
+        self.sinks = sinks
+        self.interval = interval
+        self.budget = budget
+        self.tracker = tracker or TransitionTracker()
+        self.tiers = tiers
+        self.cycles = self.overruns = self.late = self.alerts = self.sink_errors = 0
+        self.last_cycle = 0.0
+        self._fetch = None      # quote fetch not consumed yet (still running, or finished after its budget)
+        self._deliveries = set()
+
+    async def cycle(self):
+        start = time.perf_counter()
+        self.cycles += 1
+        # Daily sync (no-op once today's history is synced) runs before the budget clock starts,
+        # so a rollover backfill does not eat that cycle's quote budget
+        await asyncio.to_thread(self.levels.ensure, self.tickers)
+
+        if self._fetch is None:
+            self._fetch = asyncio.ensure_future(self._quotes())
+        done, _ = await asyncio.wait({self._fetch}, timeout=self.budget)
+        if not done:
+            self.overruns += 1  # leave it running; the next cycle uses its result instead of stacking another
+            return []
+        fetch, self._fetch = self._fetch, None
+        try:
+            quotes, took = fetch.result()
+        except Exception as e:
+            log.warning("quote fetch failed: %s", e)
+            return []
+        if took > self.budget:
+            # Source slower than the budget: keep the next fetch in flight so every cycle has a result
+            self.late += 1
+            self._fetch = asyncio.ensure_future(self._quotes())
+
+        records = self.levels.combine(quotes, self.tickers)
+        rows = build_watchlist_frame([t for t in self.tickers if t in quotes], market_frame(records), self.tiers)
+        alerts = self.tracker.observe(rows) if not rows.empty else []
+        if alerts:
+            stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            for a in alerts:
+                a.update(ts=stamp, accounts=sorted(self.watchlists[a["ticker"]]))
+            self.alerts += len(alerts)
+            self._deliver(alerts)
+        self.last_cycle = time.perf_counter() - start
+        return alerts
+
+    async def run(self, cycles=None):
+        while cycles is None or self.cycles < cycles:
+            start = time.monotonic()
+            await self.cycle()
+            await asyncio.sleep(max(self.interval - (time.monotonic() - start), 0))
+        if self._fetch is not None:
+            self._fetch.cancel()  # nothing left to consume it
+            self._fetch = None
+        if self._deliveries:
+            await asyncio.wait(self._deliveries)
+
+    def stats(self):
+        return {
+            "cycles": self.cycles, "overruns": self.overruns, "late": self.late, "alerts": self.alerts,
+            "suppressed": self.tracker.suppressed,
+            "sink_errors": self.sink_errors, "last_cycle_s": round(self.last_cycle, 4), "symbols": len(self.tickers),
+        }
+
+    async def _quotes(self):
+        # (quotes, seconds the fetch took)
+        start = time.perf_counter()
+        if inspect.iscoroutinefunction(self.source):
+            quotes = await self.source(self.tickers)
+        else:
+            quotes = await asyncio.to_thread(self.source, self.tickers)
+        return quotes, time.perf_counter() - start
+
+    def _deliver(self, alerts):
+        # Sinks run off the loop so a slow webhook never eats the next cycle's budget
+        for sink in self.sinks:
+            task = asyncio.ensure_future(asyncio.to_thread(sink.send, alerts))
+            self._deliveries.add(task)
+            task.add_done_callback(self._delivered)
+
+    def _delivered(self, task):
+        self._deliveries.discard(task)
+        if task.exception() is not None:
+            self.sink_errors += 1
+            log.warning("alert sink failed: %s", task.exception())
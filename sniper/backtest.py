@@ -0,0 +1,171 @@
+"""Vectorized backtest of the Sniper rules over the stored daily closes, swept across a parameter grid.
+
+Rules (classify_signals, with every threshold made a parameter, plus optional RSI triggers):
+    entry  (IN ZONE / ALERT or oversold):  Diff S1 <= band  or  RSI <= rsi_low
+    exit   (PROFIT or overbought):         Close >= SMA20 + mult * std20  or  RSI >= rsi_high
+rsi_low=-inf / rsi_high=inf switch RSI off, which is what the dashboard runs (RSI only colours its tables).
+Signals are taken at the close and held from the next bar; as in classify_signals, IN ZONE / ALERT win
+over PROFIT on the same bar.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .indicators import BB_WINDOW, RSI_WINDOW
+
+GRID = {
+    "span": [20, 50, 100], "band": [0.0, 0.01, 0.02, 0.03, 0.05], "mult": [1.5, 2.0, 2.5, 3.0],
+    "rsi_low": [-np.inf, 20, 25, 30, 35], "rsi_high": [np.inf, 65, 70, 75, 80],  # +-inf = RSI off
+}
+LIVE_PARAMS = {"span": 50, "band": 0.02, "mult": 2.0, "rsi_low": -np.inf, "rsi_high": np.inf}  # what the dashboard runs
+BLOCK_CELLS = int(os.environ.get("SNIPER_BACKTEST_BLOCK", "4000000"))  # combos x tickers x bars per array pass
+METRICS = ["trades", "wins", "total_return", "max_drawdown", "exposure"]
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    params: pd.DataFrame      # combo -> span / band / mult / rsi_low / rsi_high
+    per_ticker: pd.DataFrame  # (combo, ticker) -> trades / hit_rate / total_return / max_drawdown / exposure
+    aggregate: pd.DataFrame   # combo -> params + pooled hit rate, mean/median return, drawdowns
+
+    def best(self, by="mean_return", top=10):
+        return self.aggregate.nlargest(top, by)
+
+
+def param_grid(grid=None):
+    grid = {**GRID, **(grid or {})}
+    return pd.DataFrame(list(itertools.product(*grid.values())), columns=list(grid)).rename_axis("combo")
+
+
+# --- Worker side: the close matrix is shipped once per process through the pool initializer ---
+_shared = {}
+
+
+def _init_worker(close):
+    # close: tickers x bars float64, interior gaps already forward-filled
+    frame = pd.DataFrame(close.T)
+    delta = frame.diff()
+    gain = delta.clip(lower=0).rolling(RSI_WINDOW).mean()
+    loss = (-delta.clip(upper=0)).rolling(RSI_WINDOW).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = (100 - 100 / (1 + gain / loss)).to_numpy().T
+        logret = np.nan_to_num(np.diff(np.log(close), axis=1, prepend=np.nan))
+    _shared.update(
+        close=close, rsi=rsi, logret=logret, ema={},
+        ma=frame.rolling(BB_WINDOW).mean().to_numpy().T, sd=frame.rolling(BB_WINDOW).std().to_numpy().T,
+        age=np.cumsum(~np.isnan(close), axis=1),
+    )
+
+
+def _ema(span):
+    cache = _shared["ema"]
+    if span not in cache:
+        cache[span] = pd.DataFrame(_shared["close"].T).ewm(span=span, adjust=False).mean().to_numpy().T
+    return cache[span]
+
+
+def _run_group(task):
+    # One (span, mult) pair; its band x rsi_low x rsi_high combos are evaluated as (K, tickers, bars) arrays
+    span, mult, combos = task
+    close, rsi, logret = _shared["close"], _shared["rsi"], _shared["logret"]
+    ema = _ema(span)
+    with np.errstate(invalid="ignore"):
+        diff = (close - ema) / ema
+        profit = close >= _shared["ma"] + mult * _shared["sd"]
+    valid = _shared["age"] > max(span, BB_WINDOW, RSI_WINDOW)
+
+    n_tickers, n_bars = close.shape
+    step = max(1, BLOCK_CELLS // max(n_tickers * n_bars, 1))
+    out = []
+    for start in range(0, len(combos), step):
+        block = combos[start:start + step]
+        band, low, high = (np.array(col, dtype=float)[:, None, None] for col in zip(*[c[1:] for c in block]))
+        with np.errstate(invalid="ignore"):
+            entry = ((diff <= band) | (rsi <= low)) & valid
+            leave = (profit | (rsi >= high)) & valid
+        out.append((np.array([c[0] for c in block]), _evaluate(entry, leave, logret)))
+    return out
+
+
+def _evaluate(entry, leave, logret):
+    # Positions by forward-filling the last entry/exit event, then per-trade stats via nonzero + bincount
+    k, n, t = entry.shape
+    state = np.where(entry, 1, np.where(leave, 0, -1)).astype(np.int8)
+    last = np.maximum.accumulate(np.where(state >= 0, np.arange(t), 0), axis=-1)
+    pos = np.take_along_axis(state, last, axis=-1) == 1
+    held = np.zeros_like(pos)
+    held[..., 1:] = pos[..., :-1]  # decided at the close, earns from the next bar
+
+    strat = np.where(held, logret, 0.0)
+    cum = np.cumsum(strat, axis=-1)
+    peak = np.maximum(np.maximum.accumulate(cum, axis=-1), 0.0)
+    max_dd = 1 - np.exp((cum - peak).min(axis=-1))
+
+    prev = np.zeros_like(held)
+    prev[..., 1:] = held[..., :-1]
+    nxt = np.zeros_like(held)
+    nxt[..., :-1] = held[..., 1:]
+    starts, ends = np.nonzero(held & ~prev), np.nonzero(held & ~nxt)  # (k, ticker, bar), same order per column
+    trade_ret = cum[ends] - (cum - strat)[starts]
+    column = starts[0] * n + starts[1]
+    trades = np.bincount(column, minlength=k * n).reshape(k, n)
+    wins = np.bincount(column, weights=(trade_ret > 0).astype(float), minlength=k * n).reshape(k, n)
+
+    return {
+        "trades": trades, "wins": wins.astype(int), "total_return": np.expm1(cum[..., -1]),
+        "max_drawdown": max_dd, "exposure": held.mean(axis=-1),
+    }
+
+
+def _tasks(params):
+    by_group = {}
+    for combo, row in params.iterrows():
+        by_group.setdefault((int(row["span"]), float(row["mult"])), []).append(
+            (combo, row["band"], row["rsi_low"], row["rsi_high"]))
+    return [(span, mult, combos) for (span, mult), combos in by_group.items()]
+
+
+def run_backtest(close, grid=None, workers=None):
+    # close: date x ticker matrix (HistoryStore.load_close)
+    params = param_grid(grid)
+    tickers = list(close.columns)
+    matrix = close.sort_index().ffill().to_numpy(dtype=float).T.copy()
+    tasks = _tasks(params)
+
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(matrix,)) as pool:
+            results = list(pool.map(_run_group, tasks))
+    else:
+        _init_worker(matrix)
+        results = [_run_group(task) for task in tasks]
+        _shared.clear()
+
+    stats = {m: np.zeros((len(params), len(tickers))) for m in METRICS}
+    for group in results:
+        for combos, block in group:
+            for m in METRICS:
+                stats[m][combos] = block[m]
+    return summarize(params, tickers, stats)
+
+
+def summarize(params, tickers, stats):
+    index = pd.MultiIndex.from_product([params.index, tickers], names=["combo", "ticker"])
+    per_ticker = pd.DataFrame({m: stats[m].ravel() for m in METRICS}, index=index)
+    per_ticker["trades"] = per_ticker["trades"].astype(int)
+    per_ticker["wins"] = per_ticker["wins"].astype(int)
+    per_ticker["hit_rate"] = per_ticker["wins"] / per_ticker["trades"].where(per_ticker["trades"] > 0)
+
+    trades, wins = stats["trades"].sum(axis=1), stats["wins"].sum(axis=1)
+    aggregate = params.assign(
+        trades=trades.astype(int),
+        hit_rate=np.divide(wins, trades, out=np.full(len(trades), np.nan), where=trades > 0),
+        mean_return=stats["total_return"].mean(axis=1), median_return=np.median(stats["total_return"], axis=1),
+        mean_drawdown=stats["max_drawdown"].mean(axis=1), worst_drawdown=stats["max_drawdown"].max(axis=1),
+        exposure=stats["exposure"].mean(axis=1),
+    )
+    return BacktestResult(params, per_ticker, aggregate)
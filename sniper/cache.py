@@ -0,0 +1,45 @@
+"""Per-symbol market-data cache with TTL and LRU eviction."""
+import threading
+import time
+from collections import OrderedDict
+
+# cache ราย ticker (TTL + LRU) แทนการ cache ทั้ง list
+CACHE_TTL = 60
+CACHE_MAX_SYMBOLS = 2000
+
+
+class SymbolCache:
+    def __init__(self, ttl=CACHE_TTL, maxsize=CACHE_MAX_SYMBOLS):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # ticker -> (expires_at, record), oldest use first
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def lookup(self, tickers):
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for t in tickers:
+                entry = self._entries.get(t)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(t)
+                    found[t] = entry[1]
+                else:
+                    missing.append(t)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, records):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for t, record in records.items():
+                self._entries[t] = (expires, record)
+                self._entries.move_to_end(t)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,37 @@
+"""Plotly figures for the dashboard (plotly is imported only when a chart is built)."""
+
+PIE_COLORS = ['#333333', '#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b', '#7f7f7f', '#bcbd22', '#17becf']
+
+
+def allocation_pie(df, cash, total_value):
+    import plotly.graph_objects as go
+
+    if not df.empty:
+        labels = list(df['Ticker']) + ['CASH 💵']
+        values = list(df['Value USD']) + [cash]
+    else:
+        labels = ['CASH 💵']
+        values = [cash]
+
+    fig_pie = go.Figure(data=[go.Pie(
+        labels=labels, values=values, hole=.5, marker_colors=PIE_COLORS,
+        textinfo='label+percent', textposition='inside', textfont=dict(size=16, color='white')
+    )])
+    fig_pie.update_layout(
+        margin=dict(t=20, b=20, l=20, r=20), height=350, showlegend=True,
+        legend=dict(orientation="h", yanchor="top", y=-0.1, xanchor="center", x=0.5, font=dict(size=14)),
+        annotations=[dict(text=f'Total<br><b>${total_value:,.0f}</b>', x=0.5, y=0.5, font_size=24, showarrow=False)]
+    )
+    return fig_pie
+
+
+def correlation_heatmap(corr):
+    import plotly.graph_objects as go
+
+    show_values = len(corr) <= 15  # numbers in the cells only while they stay readable
+    fig = go.Figure(data=go.Heatmap(
+        z=corr.to_numpy(), x=list(corr.columns), y=list(corr.index), zmin=-1, zmax=1, colorscale="RdBu_r",
+        text=corr.round(2).to_numpy() if show_values else None, texttemplate="%{text}" if show_values else None,
+    ))
+    fig.update_layout(margin=dict(t=20, b=20, l=20, r=20), height=max(300, min(18 * len(corr), 900)))
+    return fig
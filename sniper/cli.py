@@ -0,0 +1,276 @@
+"""Batch mode: value many portfolios and score their watchlists without Streamlit.
+
+    python -m sniper batch accounts.json [positions.csv watchlists.csv ...] --out-dir out --format parquet
+    python -m sniper screen [TICKER ...] [--universe tickers.txt] --signals "IN ZONE" ALERT --rank upside --top 20
+    python -m sniper backtest [TICKER ...] [--universe tickers.txt] --spans 20 50 --bands 0 0.02 --workers 8
+    python -m sniper alerts accounts.json [watchlists.csv ...] --jsonl alerts.jsonl --webhook http://localhost:9000/hook
+
+accounts.json:  {"<account>": {"portfolio": [{"Ticker", "Category", "Avg Cost", "Qty"}, ...],
+                               "watchlist": ["AAPL", ...], "cash": 400}}
+positions.csv:  Account, Ticker, Category, Avg Cost, Qty
+watchlist.csv:  Account, Ticker
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+POSITION_COLUMNS = ["Account", "Ticker", "Category", "Avg Cost", "Qty"]
+TOTAL_COLUMNS = ["Value USD", "Total Gain USD", "Day Change USD", "Total Cost"]
+SCREEN_COLUMNS = ["Ticker", "Tier", "Signal Name", "Price", "% Day", "Diff S1", "RSI", "Upside", "Buy Lv.1", "Sell Lv.1"]
+SCREEN_RANKS = {"diff": "Diff S1", "upside": "Upside"}
+
+
+def read_accounts(paths):
+    import pandas as pd
+
+    positions, watch, cash = [], [], {}
+    for path in paths:
+        if path.lower().endswith(".json"):
+            with open(path, encoding="utf-8") as fh:
+                for account, spec in json.load(fh).items():
+                    positions += [dict(p, Account=account) for p in spec.get("portfolio", [])]
+                    watch += [{"Account": account, "Ticker": t} for t in spec.get("watchlist", [])]
+                    cash[account] = cash.get(account, 0.0) + float(spec.get("cash", 0.0))
+        else:
+            df = pd.read_csv(path)
+            if "Account" not in df:
+                df.insert(0, "Account", "default")
+            if "Qty" in df:
+                positions += df.to_dict("records")
+            else:
+                watch += df[["Account", "Ticker"]].to_dict("records")
+
+    positions = pd.DataFrame(positions, columns=POSITION_COLUMNS)
+    watch = pd.DataFrame(watch, columns=["Account", "Ticker"])
+    for frame in (positions, watch):
+        frame["Account"] = frame["Account"].astype(str)
+        frame["Ticker"] = frame["Ticker"].astype(str).str.strip().str.upper()
+    return positions, watch.drop_duplicates(), cash
+
+
+def rsi_cutoff(off):
+    # argparse type for --rsi-low / --rsi-high: a number, or "off" (-inf / inf never triggers)
+    def parse(value):
+        return off if value.lower() == "off" else float(value)
+    return parse
+
+
+def write_table(df, out_dir, name, fmt):
+    path = os.path.join(out_dir, f"{name}.{fmt}")
+    if fmt == "parquet":
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError as e:
+            raise SystemExit(f"Parquet output needs pyarrow (pip install pyarrow): {e}")
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def run_batch(args):
+    import pandas as pd
+
+    from .fetch import ChunkedFetcher
+    from .pipeline import load_daily_levels
+    from .signals import build_portfolio_frame, build_watchlist_frame, market_frame
+    from .store import HISTORY_DB, HistoryStore
+
+    positions, watch, cash = read_accounts(args.inputs)
+    tickers = sorted(set(positions["Ticker"]) | set(watch["Ticker"]))
+    store = HistoryStore(args.db or HISTORY_DB, download=ChunkedFetcher().download)
+    market_df = market_frame(load_daily_levels(store, tickers, refresh=not args.offline))
+
+    # One vectorized pass over every account's rows; accounts only matter for grouping
+    valuations = build_portfolio_frame(positions.to_dict("records"), market_df)
+    accounts = sorted(set(positions["Account"]) | set(watch["Account"]) | set(cash))
+    if valuations.empty:
+        summary = pd.DataFrame(0.0, index=accounts, columns=TOTAL_COLUMNS)
+    else:
+        summary = valuations.groupby("Account")[TOTAL_COLUMNS].sum().reindex(accounts, fill_value=0.0)
+    summary["Cash"] = pd.Series(cash, dtype=float).reindex(accounts).fillna(0.0)
+    summary["Total Value"] = summary["Value USD"] + summary["Cash"]
+    summary = summary.rename_axis("Account").reset_index()
+
+    if watch.empty:
+        signals = pd.DataFrame(columns=["Account", "Ticker"])
+    else:
+        signals = watch.merge(build_watchlist_frame(watch["Ticker"], market_df), on="Ticker", how="left")
+        signals = signals.sort_values(["Account", "Signal", "Diff S1"])
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, df in (("valuations", valuations), ("summary", summary), ("signals", signals)):
+        path = write_table(df, args.out_dir, name, args.format)
+        print(f"{name}: {len(df)} rows -> {path}", file=sys.stderr)
+
+
+def read_universe(path):
+    # One symbol per line / comma separated, or a CSV with a Ticker column
+    from .screener import parse_tickers
+
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if path.lower().endswith(".csv") and text.split("\n", 1)[0].strip().lower().startswith("ticker"):
+        import pandas as pd
+
+        return parse_tickers(" ".join(pd.read_csv(path)["Ticker"].astype(str)))
+    return parse_tickers(text)
+
+
+def run_screen(args):
+    from .fetch import ChunkedFetcher
+    from .pipeline import load_daily_levels
+    from .screener import SignalIndex, parse_tickers
+    from .signals import PRB_TIERS
+    from .store import HISTORY_DB, HistoryStore
+
+    tickers = parse_tickers(" ".join(args.tickers))
+    for path in args.universe or []:
+        tickers += read_universe(path)
+    tickers = list(dict.fromkeys(tickers)) or list(PRB_TIERS)
+
+    store = HistoryStore(args.db or HISTORY_DB, download=ChunkedFetcher().download)
+    index = SignalIndex()
+    index.update(load_daily_levels(store, tickers, refresh=not args.offline))
+    result = index.scan(tickers, args.tiers, args.signals, SCREEN_RANKS[args.rank], args.top)[SCREEN_COLUMNS]
+
+    print(f"screened {len(tickers)} symbols, {len(result)} candidates", file=sys.stderr)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        print(f"screen -> {write_table(result, args.out_dir, 'screen', args.format)}", file=sys.stderr)
+    else:
+        print(result.to_string(index=False))
+
+
+def run_backtest_cli(args):
+    from .backtest import GRID, LIVE_PARAMS, run_backtest
+    from .fetch import ChunkedFetcher
+    from .screener import parse_tickers
+    from .signals import PRB_TIERS
+    from .store import HISTORY_DB, HistoryStore
+
+    tickers = parse_tickers(" ".join(args.tickers))
+    for path in args.universe or []:
+        tickers += read_universe(path)
+    tickers = list(dict.fromkeys(tickers)) or list(PRB_TIERS)
+
+    store = HistoryStore(args.db or HISTORY_DB, download=ChunkedFetcher().download)
+    if not args.offline:
+        store.refresh(tickers)
+    close = store.load_close(tickers)
+    if close.empty:
+        raise SystemExit("No stored history for these tickers (run without --offline first)")
+
+    grid = {axis: getattr(args, axis) or GRID[axis] for axis in GRID}
+    result = run_backtest(close, grid, workers=args.workers)
+    print(f"backtested {len(result.params)} combos x {close.shape[1]} symbols x {len(close)} bars", file=sys.stderr)
+
+    live = result.aggregate
+    for axis, value in LIVE_PARAMS.items():
+        live = live[live[axis] == value]
+    print(result.best(args.sort, args.top).to_string())
+    if not live.empty:
+        rank = int((result.aggregate[args.sort] > live[args.sort].iloc[0]).sum()) + 1
+        print(f"\ndashboard rules (Diff S1 entry, Sell Lv.1 exit, RSI off) {LIVE_PARAMS}: "
+              f"rank {rank} of {len(result.aggregate)} by {args.sort}")
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        for name, df in (("backtest_summary", result.aggregate), ("backtest_tickers", result.per_ticker)):
+            path = write_table(df.reset_index(), args.out_dir, name, args.format)
+            print(f"{name}: {len(df)} rows -> {path}", file=sys.stderr)
+
+
+def run_alerts(args):
+    import asyncio
+    import logging
+    from functools import partial
+
+    from .alerts import AlertDaemon, JsonlSink, TransitionTracker, WebhookSink
+    from .fetch import ChunkedFetcher
+    from .pipeline import DailyLevels, fetch_quotes
+    from .store import HISTORY_DB, HistoryStore
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    _, watch, _ = read_accounts(args.inputs)
+    watchlists = {}
+    for account, ticker in watch[["Account", "Ticker"]].itertuples(index=False):
+        watchlists.setdefault(ticker, set()).add(account)
+    if not watchlists:
+        raise SystemExit("No watchlist symbols in the inputs")
+
+    sinks = [JsonlSink(path) for path in args.jsonl or []] + [WebhookSink(url) for url in args.webhook or []]
+    if not sinks:
+        sinks = [JsonlSink("-")]
+    fetcher = ChunkedFetcher()
+    daemon = AlertDaemon(
+        watchlists, partial(fetch_quotes, download=fetcher.download), DailyLevels(HistoryStore(args.db or HISTORY_DB, download=fetcher.download)),
+        sinks, interval=args.interval, budget=args.budget, tracker=TransitionTracker(args.signals, args.cooldown),
+    )
+    print(f"watching {len(watchlists)} symbols every {args.interval:g}s (budget {args.budget:g}s)", file=sys.stderr)
+    try:
+        asyncio.run(daemon.run(args.cycles))
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(daemon.stats()), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sniper", description="Sniper Portfolio batch tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="value portfolios and score watchlists for many accounts")
+    batch.add_argument("inputs", nargs="+", help="accounts .json and/or positions / watchlist .csv files")
+    batch.add_argument("--out-dir", default=".", help="where valuations/summary/signals are written")
+    batch.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    batch.add_argument("--db", help="history store path (default: $SNIPER_HISTORY_DB or ./sniper_history.sqlite)")
+    batch.add_argument("--offline", action="store_true", help="use stored bars only, no downloads")
+    batch.set_defaults(func=run_batch)
+
+    screen = sub.add_parser("screen", help="rank a whole universe by the Sniper signal rules")
+    screen.add_argument("tickers", nargs="*", help="symbols to scan (default: every PRB tier symbol)")
+    screen.add_argument("--universe", action="append", help="file of symbols (.txt or .csv with a Ticker column), repeatable")
+    screen.add_argument("--tiers", nargs="+", help="keep only these PRB tiers, e.g. S+ S A+")
+    screen.add_argument("--signals", nargs="+", help="keep only these signals: IN ZONE, ALERT, Wait, PROFIT, No Data")
+    screen.add_argument("--rank", choices=list(SCREEN_RANKS), default="diff", help="diff: lowest Diff S1 first, upside: largest first")
+    screen.add_argument("--top", type=int, default=25, help="how many candidates to keep (0 = all)")
+    screen.add_argument("--out-dir", help="write screen.<format> here instead of printing")
+    screen.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    screen.add_argument("--db", help="history store path (default: $SNIPER_HISTORY_DB or ./sniper_history.sqlite)")
+    screen.add_argument("--offline", action="store_true", help="use stored bars only, no downloads")
+    screen.set_defaults(func=run_screen)
+
+    bt = sub.add_parser("backtest", help="replay the Sniper rules over stored history across a parameter grid")
+    bt.add_argument("tickers", nargs="*", help="symbols to replay (default: every PRB tier symbol)")
+    bt.add_argument("--universe", action="append", help="file of symbols (.txt or .csv with a Ticker column), repeatable")
+    bt.add_argument("--spans", dest="span", type=int, nargs="+", help="EMA spans for Diff S1 (default 20 50 100)")
+    bt.add_argument("--bands", dest="band", type=float, nargs="+", help="ALERT bands as fractions (default 0 .01 .02 .03 .05)")
+    bt.add_argument("--mults", dest="mult", type=float, nargs="+", help="Bollinger multipliers for Sell1 (default 1.5 2 2.5 3)")
+    bt.add_argument("--rsi-low", dest="rsi_low", type=rsi_cutoff(-math.inf), nargs="+",
+                    help="oversold entry cutoffs, 'off' = no RSI entry (default off 20 25 30 35)")
+    bt.add_argument("--rsi-high", dest="rsi_high", type=rsi_cutoff(math.inf), nargs="+",
+                    help="overbought exit cutoffs, 'off' = no RSI exit (default off 65 70 75 80)")
+    bt.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    bt.add_argument("--sort", choices=["mean_return", "median_return", "hit_rate"], default="mean_return")
+    bt.add_argument("--top", type=int, default=10, help="best combos to print")
+    bt.add_argument("--out-dir", help="write backtest_summary / backtest_tickers tables here")
+    bt.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    bt.add_argument("--db", help="history store path (default: $SNIPER_HISTORY_DB or ./sniper_history.sqlite)")
+    bt.add_argument("--offline", action="store_true", help="use stored bars only, no downloads")
+    bt.set_defaults(func=run_backtest_cli)
+
+    alerts = sub.add_parser("alerts", help="poll watchlists and push signal transitions (IN ZONE / PROFIT) to sinks")
+    alerts.add_argument("inputs", nargs="+", help="accounts .json and/or watchlist .csv files")
+    alerts.add_argument("--jsonl", action="append", help="append alerts to this JSON-lines file ('-' = stdout), repeatable")
+    alerts.add_argument("--webhook", action="append", help="POST alerts as JSON to this URL, repeatable")
+    alerts.add_argument("--signals", nargs="+", default=["IN ZONE", "PROFIT"], help="transitions that alert")
+    alerts.add_argument("--interval", type=float, default=5.0, help="seconds between polls")
+    alerts.add_argument("--budget", type=float, default=3.0, help="max seconds a poll may take before the cycle is skipped")
+    alerts.add_argument("--cooldown", type=float, default=1800, help="seconds before the same ticker + signal alerts again")
+    alerts.add_argument("--cycles", type=int, help="stop after this many polls (default: run forever)")
+    alerts.add_argument("--db", help="history store path (default: $SNIPER_HISTORY_DB or ./sniper_history.sqlite)")
+    alerts.set_defaults(func=run_alerts)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
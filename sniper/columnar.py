@@ -0,0 +1,108 @@
+"""Process-wide in-memory Close columns: float32, window-truncated, LRU-evicted under a byte budget."""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .indicators import HIGH_WINDOW
+
+EMA_WARMUP = 250                         # extra bars so EMA200 has settled before the 252-bar window
+WINDOW_BARS = HIGH_WINDOW + EMA_WARMUP   # ~ the 2y the history store keeps
+MEMORY_BUDGET = int(float(os.environ.get("SNIPER_CLOSE_BUDGET_MB", "64")) * 2**20)
+
+
+class ColumnarStore:
+    # ticker -> (int32 day numbers, float32 closes); cold symbols are evicted and reloaded from the loader
+    def __init__(self, loader, budget=MEMORY_BUDGET, window=WINDOW_BARS):
+        self.loader = loader  # tickers -> date x ticker Close matrix (HistoryStore.load_close)
+        self.budget = budget
+        self.window = window
+        self.nbytes = 0
+        self.loads = self.evictions = 0
+        self._columns = OrderedDict()
+        self._empty = set()  # loader had nothing for these; don't hit SQLite again until put()
+        self._lock = threading.Lock()
+
+    def put(self, close, tickers=()):
+        # Replace the columns of `tickers` (and every column of `close`) with fresh data
+        columns = self._encode(close)
+        with self._lock:
+            for t in set(tickers) | set(columns):
+                self._drop(t)
+            self._empty.update(t for t in tickers if t not in columns)
+            self._insert(columns)
+
+    def frame(self, tickers):
+        # float64 date x ticker matrix for `tickers`; non-resident symbols are reloaded in one query
+        with self._lock:
+            found = {}
+            for t in tickers:
+                if t in self._columns:
+                    self._columns.move_to_end(t)
+                    found[t] = self._columns[t]
+            missing = [t for t in tickers if t not in found and t not in self._empty]
+        if missing:
+            loaded = self._encode(self.loader(missing))
+            with self._lock:
+                self.loads += len(loaded)
+                self._empty.update(t for t in missing if t not in loaded)
+                self._insert(loaded)
+            found.update(loaded)
+
+        if not found:
+            return pd.DataFrame()
+        series = {
+            t: pd.Series(values.astype(np.float64), index=days.astype("datetime64[D]").astype("datetime64[ns]"))
+            for t, (days, values) in found.items()
+        }
+        return pd.DataFrame(series).sort_index()[[t for t in tickers if t in series]]
+
+    def last_bars(self, tickers):
+        # (day, close) of each ticker's newest stored bar: a cheap key for anything derived from these columns
+        with self._lock:
+            missing = [t for t in tickers if t not in self._columns and t not in self._empty]
+        if missing:
+            self.frame(missing)
+        with self._lock:
+            return tuple(
+                (int(self._columns[t][0][-1]), float(self._columns[t][1][-1])) if t in self._columns else None
+                for t in tickers
+            )
+
+    def footprint(self):
+        with self._lock:
+            return {
+                "symbols": len(self._columns), "bytes": self.nbytes, "budget": self.budget,
+                "loads": self.loads, "evictions": self.evictions,
+            }
+
+    def _encode(self, close):
+        columns = {}
+        if close is None or close.empty:
+            return columns
+        days = close.index.values.astype("datetime64[D]").astype(np.int32)
+        values = close.to_numpy(dtype=np.float32)
+        for i, t in enumerate(close.columns):
+            keep = ~np.isnan(values[:, i])
+            col_days, col_values = days[keep][-self.window:], values[keep, i][-self.window:]
+            if len(col_values):
+                columns[t] = (np.ascontiguousarray(col_days), np.ascontiguousarray(col_values))
+        return columns
+
+    def _insert(self, columns):
+        for t, col in columns.items():
+            self._drop(t)
+            self._columns[t] = col
+            self.nbytes += col[0].nbytes + col[1].nbytes
+        while self.nbytes > self.budget and self._columns:
+            _, (days, values) = self._columns.popitem(last=False)
+            self.nbytes -= days.nbytes + values.nbytes
+            self.evictions += 1
+
+    def _drop(self, t):
+        self._empty.discard(t)
+        col = self._columns.pop(t, None)
+        if col is not None:
+            self.nbytes -= col[0].nbytes + col[1].nbytes
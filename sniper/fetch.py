@@ -0,0 +1,140 @@
+"""Market-data downloads: yf.download wrapper and the chunked, rate-limited fetcher."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+
+def yf_download(*args, **kwargs):
+    import yfinance as yf  # imported on first download - it is slow to import and the CLI may never need it
+    return yf.download(*args, **kwargs)
+
+
+def chunked(seq, size):
+    seq = list(seq)
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def split_download(df_hist, tickers):
+    # yf.download gives (ticker, field) columns for a list of symbols, flat columns for a single one
+    frames = {}
+    if df_hist is None or df_hist.empty:
+        return frames
+    if isinstance(df_hist.columns, pd.MultiIndex):
+        available = set(df_hist.columns.get_level_values(0))
+        for t in tickers:
+            if t in available:
+                frames[t] = df_hist[t]
+    elif len(tickers) == 1:
+        frames[tickers[0]] = df_hist
+    return frames
+
+
+# แบ่ง ticker เป็นชุด ดึงขนานกันแบบจำกัดจำนวน, retry + circuit breaker
+FETCH_CHUNK_SIZE = int(os.environ.get("SNIPER_FETCH_CHUNK", "50"))
+FETCH_WORKERS = int(os.environ.get("SNIPER_FETCH_WORKERS", "4"))
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 1.0        # seconds, doubled on every retry
+FETCH_RATE = 4.0           # chunk requests per second across all workers
+BREAKER_THRESHOLD = 3      # consecutive failures before a symbol is skipped
+BREAKER_COOLDOWN = 30 * 60
+
+
+class RateLimiter:
+    def __init__(self, rate, sleep=time.sleep):
+        self.interval = 1.0 / rate
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+class CircuitBreaker:
+    # Per-symbol: open after `threshold` misses in a row from chunks that otherwise came back, retry after `cooldown`
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = {}
+        self.open_until = {}
+        self._lock = threading.Lock()
+
+    def allow(self, ticker):
+        return self.open_until.get(ticker, 0.0) <= time.monotonic()
+
+    def record(self, ok, failed):
+        now = time.monotonic()
+        with self._lock:
+            for t in ok:
+                self.failures.pop(t, None)
+                self.open_until.pop(t, None)
+            for t in failed:
+                self.failures[t] = self.failures.get(t, 0) + 1
+                if self.failures[t] >= self.threshold:
+                    self.open_until[t] = now + self.cooldown
+
+    def open_symbols(self):
+        now = time.monotonic()
+        return sorted(t for t, until in self.open_until.items() if until > now)
+
+
+class ChunkedFetcher:
+    # Drop-in for yf.download: same arguments, same (ticker, field) frame, failures only drop their rows
+    def __init__(self, download=None, chunk_size=FETCH_CHUNK_SIZE, workers=FETCH_WORKERS, retries=FETCH_RETRIES,
+                 backoff=FETCH_BACKOFF, rate=FETCH_RATE, breaker=None, sleep=time.sleep):
+        self._download = download or yf_download
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.limiter = RateLimiter(rate, sleep)
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = self.retried = self.throttled = 0
+        self._lock = threading.Lock()  # counters are bumped from the pool threads
+
+    def download(self, tickers, **kwargs):
+        allowed = [t for t in tickers if self.breaker.allow(t)]
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._fetch_chunk, chunk, kwargs) for chunk in chunked(allowed, self.chunk_size)]
+            for future in as_completed(futures):
+                frames.update(future.result())
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def _fetch_chunk(self, chunk, kwargs):
+        got, raised = {}, False
+        for attempt in range(self.retries):
+            self.limiter.wait()
+            with self._lock:
+                self.requests += 1
+            try:
+                df = self._download(chunk, **kwargs)
+                got = {t: f for t, f in split_download(df, chunk).items() if "Close" in f and f["Close"].notna().any()}
+                raised = False
+            except Exception:
+                got, raised = {}, True
+            # Only a raising download looks like throttling; an answer with missing symbols (yfinance returns an
+            # empty frame for an unknown ticker) means bad symbols and is not worth retrying
+            if not raised or attempt == self.retries - 1:
+                break
+            with self._lock:
+                self.retried += 1
+            self.sleep(self.backoff * 2 ** attempt)
+        if raised and len(chunk) > 1:
+            with self._lock:
+                self.throttled += 1  # the whole chunk failed: the backoff above handles it, no symbol is to blame
+        else:
+            self.breaker.record(got, [t for t in chunk if t not in got])
+        return got
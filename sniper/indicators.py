@@ -0,0 +1,158 @@
+"""Indicator engine: batched levels over a Close matrix and O(1) streaming state per ticker."""
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# คำนวณทุก ticker พร้อมกันบน Close matrix (date x ticker)
+EMPTY_LEVELS = {"Price": 0, "PrevClose": 0, "EMA50": 0, "EMA200": 0, "RSI": 50, "Sell1": 0, "Sell2": 0}
+MIN_BARS = 200
+
+
+def bottom_align(close):
+    # Move each column's NaNs to the top so the last rows hold every ticker's own latest bars.
+    # Same result as a per-ticker dropna(), without one copy per symbol.
+    values = close.to_numpy(dtype=float)
+    order = np.argsort(~np.isnan(values), axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0)
+
+
+def compute_indicators(close):
+    if close.empty:
+        return {}
+    values = bottom_align(close)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+
+    ema = pd.DataFrame(values)
+    ema50 = ema.ewm(span=50, adjust=False).mean().to_numpy()[-1]
+    ema200 = ema.ewm(span=200, adjust=False).mean().to_numpy()[-1]
+
+    delta = np.diff(values[-15:], axis=0)
+    gain = np.where(delta > 0, delta, 0).mean(axis=0)
+    loss = np.where(delta < 0, -delta, 0).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + gain / loss))
+
+    last20 = values[-20:]
+    sell1 = last20.mean(axis=0) + last20.std(axis=0, ddof=1) * 2
+    sell2 = np.fmax.reduce(values[-252:], axis=0)
+
+    levels = pd.DataFrame({
+        "Price": values[-1], "PrevClose": values[-2] if len(values) > 1 else np.nan,
+        "EMA50": ema50, "EMA200": ema200, "RSI": rsi, "Sell1": sell1, "Sell2": sell2,
+    }, index=close.columns)
+    levels.loc[counts < MIN_BARS, list(EMPTY_LEVELS)] = list(EMPTY_LEVELS.values())
+    return levels.to_dict("index")
+
+
+# อัปเดต EMA/RSI/Bollinger/52W High ทีละ tick แบบ O(1)
+RSI_WINDOW, BB_WINDOW, HIGH_WINDOW = 14, 20, 252
+
+
+class IndicatorState:
+    __slots__ = ("n", "last_date", "last_close", "ema50", "ema200",
+                 "gains", "losses", "gain_sum", "loss_sum", "window", "win_sum", "win_sumsq", "highs")
+
+    def __init__(self):
+        self.n = 0
+        self.last_date = None
+        self.last_close = math.nan
+        self.ema50 = self.ema200 = math.nan
+        self.gains, self.losses = deque(maxlen=RSI_WINDOW), deque(maxlen=RSI_WINDOW)
+        self.gain_sum = self.loss_sum = 0.0
+        self.window = deque(maxlen=BB_WINDOW)
+        self.win_sum = self.win_sumsq = 0.0
+        self.highs = deque()  # (bar index, close) with strictly decreasing closes
+
+    def update(self, close, bar_date=None):
+        # Fold in one completed daily bar
+        if self.n:
+            delta = close - self.last_close
+            self.gains.append(max(delta, 0.0))
+            self.losses.append(max(-delta, 0.0))
+            self.ema50 += (close - self.ema50) * 2 / 51
+            self.ema200 += (close - self.ema200) * 2 / 201
+        else:
+            self.ema50 = self.ema200 = close
+        self.window.append(close)
+        # Re-summing the fixed-size windows once per bar keeps peek() O(1) without float drift
+        self.gain_sum, self.loss_sum = sum(self.gains), sum(self.losses)
+        self.win_sum, self.win_sumsq = sum(self.window), sum(x * x for x in self.window)
+
+        while self.highs and self.highs[-1][1] <= close:
+            self.highs.pop()
+        self.highs.append((self.n, close))
+        while self.highs[0][0] <= self.n - HIGH_WINDOW:
+            self.highs.popleft()
+
+        self.n += 1
+        self.last_close = close
+        self.last_date = bar_date
+
+    def peek(self, last_price):
+        # Levels as if last_price closed a new bar; the state itself is left untouched
+        if self.n + 1 < MIN_BARS:
+            return dict(EMPTY_LEVELS)
+        delta = last_price - self.last_close
+        gain = (self.gain_sum - self.gains[0] + max(delta, 0.0)) / RSI_WINDOW
+        loss = (self.loss_sum - self.losses[0] + max(-delta, 0.0)) / RSI_WINDOW
+        if loss:
+            rsi = 100 - (100 / (1 + gain / loss))
+        else:
+            rsi = 100.0 if gain else math.nan
+
+        s = self.win_sum - self.window[0] + last_price
+        sq = self.win_sumsq - self.window[0] ** 2 + last_price * last_price
+        std = math.sqrt(max((sq - s * s / BB_WINDOW) / (BB_WINDOW - 1), 0.0))
+
+        # The new bar pushes the oldest one out of the 252-bar window
+        first = 0 if self.highs[0][0] > self.n - HIGH_WINDOW else 1
+        high = self.highs[first][1] if len(self.highs) > first else last_price
+
+        return {
+            "Price": last_price, "PrevClose": self.last_close,
+            "EMA50": self.ema50 + (last_price - self.ema50) * 2 / 51,
+            "EMA200": self.ema200 + (last_price - self.ema200) * 2 / 201,
+            "RSI": rsi, "Sell1": s / BB_WINDOW + std * 2, "Sell2": max(high, last_price),
+        }
+
+
+class IndicatorBook:
+    # One IndicatorState per ticker, caught up from the history store's Close matrix
+    def __init__(self):
+        self.states = {}
+        self._before = {}  # ticker -> cutoff of its last sync
+        self._lock = threading.Lock()
+
+    def reset(self, tickers):
+        with self._lock:
+            for t in tickers:
+                self.states.pop(t, None)
+                self._before.pop(t, None)
+
+    def stale(self, tickers, before=None):
+        # Tickers a sync() with this cutoff would actually feed
+        with self._lock:
+            return [t for t in tickers if t not in self.states or before is None or self._before.get(t) != before]
+
+    def sync(self, close, before=None):
+        # Feed every state only the bars it has not seen, stopping before `before` (today's open bar)
+        with self._lock:
+            for t in close.columns:
+                if t in self.states and before is not None and self._before.get(t) == before:
+                    continue
+                self._before[t] = before
+                series = close[t].dropna()
+                state = self.states.setdefault(t, IndicatorState())
+                if state.last_date is not None:
+                    series = series[series.index > state.last_date]
+                if before is not None:
+                    series = series[series.index < before]
+                for bar_date, c in series.items():
+                    state.update(float(c), bar_date)
+
+    def peek(self, ticker, last_price):
+        state = self.states.get(ticker)
+        return state.peek(last_price) if state else dict(EMPTY_LEVELS)
@@ -0,0 +1,82 @@
+"""Timing spans and counters for the render path, exported as Prometheus text or JSON lines."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_PROM = os.environ.get("SNIPER_METRICS_PROM")    # node_exporter textfile path
+METRICS_JSONL = os.environ.get("SNIPER_METRICS_JSONL")  # one JSON record per rerun
+
+
+class Metrics:
+    # Process-wide: per-stage count/sum/max across every rerun + the latest counter totals
+    def __init__(self):
+        self.stages = {}    # stage -> [count, sum_seconds, max_seconds]
+        self.counters = {}  # name -> monotonic total
+        self.gauges = {}    # name -> point-in-time value (may go down)
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            count, total, peak = self.stages.get(stage, (0, 0.0, 0.0))
+            self.stages[stage] = [count + 1, total + seconds, max(peak, seconds)]
+
+    def set_counters(self, counters, gauges=None):
+        with self._lock:
+            self.counters.update(counters)
+            self.gauges.update(gauges or {})
+
+    def prometheus(self):
+        with self._lock:
+            stages, counters, gauges = dict(self.stages), dict(self.counters), dict(self.gauges)
+        lines = ["# HELP sniper_stage_seconds Time spent per render stage.", "# TYPE sniper_stage_seconds summary"]
+        for stage, (count, total, _) in sorted(stages.items()):
+            lines.append(f'sniper_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'sniper_stage_seconds_count{{stage="{stage}"}} {count}')
+        lines.append("# TYPE sniper_stage_seconds_max gauge")
+        lines += [f'sniper_stage_seconds_max{{stage="{stage}"}} {peak:.6f}' for stage, (_, _, peak) in sorted(stages.items())]
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE sniper_{name}_total counter", f"sniper_{name}_total {value}"]
+        for name, value in sorted(gauges.items()):
+            lines += [f"# TYPE sniper_{name} gauge", f"sniper_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Write-then-rename so the collector never reads a half-written file
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def append_jsonl(self, path, record):
+        with self._lock, open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+
+
+class RunRecorder:
+    # One rerun's spans; every span is also folded into the shared Metrics
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.spans = {}
+        self.started = time.time()
+        self.finished = False
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+            self.metrics.observe(stage, seconds)
+
+    def finish(self, counters, gauges=None, session=None, prom_path=METRICS_PROM, jsonl_path=METRICS_JSONL):
+        self.finished = True
+        self.metrics.set_counters(counters, gauges)
+        if prom_path:
+            self.metrics.write_prometheus(prom_path)
+        if jsonl_path:
+            record = {"ts": round(self.started, 3), "session": session, "spans": self.spans, "counters": counters, "gauges": gauges or {}}
+            self.metrics.append_jsonl(jsonl_path, record)
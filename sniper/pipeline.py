@@ -0,0 +1,95 @@
+"""Two-tier market data: daily history once per day, a light live-quote poll in between."""
+import threading
+from datetime import date
+
+import pandas as pd
+
+from .columnar import ColumnarStore
+from .fetch import split_download, yf_download
+from .indicators import EMPTY_LEVELS, IndicatorBook, compute_indicators
+
+# history รายวันดึงวันละครั้ง, ระหว่างวันดึงแค่ราคาล่าสุด
+QUOTE_PERIOD = "5d"  # a handful of daily bars per symbol is enough for the live price
+
+
+def bar_day(ts):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize(None) if ts.tzinfo else ts).normalize()
+
+
+def fetch_quotes(tickers, download=None):
+    # Fast path: (bar date, last price) per symbol from one small batched request
+    df = (download or yf_download)(
+        tickers, period=QUOTE_PERIOD, interval="1d", group_by='ticker', auto_adjust=True, threads=True, progress=False
+    )
+    quotes = {}
+    for t, df_t in split_download(df, tickers).items():
+        close = df_t["Close"].dropna()
+        if not close.empty:
+            quotes[t] = (bar_day(close.index[-1]), float(close.iloc[-1]))
+    return quotes
+
+
+class DailyLevels:
+    # Slow path: daily history refreshed once per session day, feeding the streaming IndicatorBook
+    def __init__(self, store, closes=None):
+        self.store = store
+        self.book = IndicatorBook()
+        self.closes = closes or ColumnarStore(store.load_close)
+        self._synced = {}  # ticker -> day its history was last refreshed
+        self._lock = threading.Lock()
+
+    def ensure(self, tickers, today=None):
+        today = today or date.today()
+        stale = [t for t in tickers if self._synced.get(t) != today]
+        if not stale:
+            return
+        try:
+            refreshed = self.store.refresh(stale)
+        except Exception:
+            refreshed = set()  # ใช้ข้อมูลที่มีอยู่ในเครื่องไปก่อน แล้วลองใหม่รอบหน้า
+        close = self.store.load_close(stale)
+        with self._lock:
+            self.closes.put(close, stale)
+            self.book.reset(stale)
+            self._synced.update(dict.fromkeys(refreshed, today))
+
+    def combine(self, quotes, tickers):
+        # Levels through the last completed bar + the live price as today's bar, O(1) per ticker
+        records = {}
+        with self._lock:
+            by_day = {}
+            for t in tickers:
+                if t in quotes:
+                    by_day.setdefault(quotes[t][0], []).append(t)
+            for bar_date, group in by_day.items():
+                # Only states behind this cutoff need bars; evicted columns come back from SQLite
+                pending = self.book.stale(group, before=bar_date)
+                if pending:
+                    self.book.sync(self.closes.frame(pending), before=bar_date)
+                records.update({t: self.book.peek(t, quotes[t][1]) for t in group if t in self.book.states})
+            no_quote = [t for t in tickers if t not in records]
+            if no_quote:
+                close = self.closes.frame(no_quote)
+                if not close.empty:
+                    records.update(compute_indicators(close))  # fall back to the last stored close
+        return {t: records.get(t, dict(EMPTY_LEVELS)) for t in tickers}
+
+
+def fetch_market_data(levels, tickers):
+    if not tickers: return {}
+    levels.ensure(tickers)
+    try:
+        quotes = fetch_quotes(tickers, download=levels.store.download)
+    except Exception:
+        quotes = {}
+    return levels.combine(quotes, tickers)
+
+
+def load_daily_levels(store, tickers, refresh=True):
+    # Batch path (CLI/nightly): levels from stored daily bars, one vectorized pass, no live quotes
+    if not tickers: return {}
+    if refresh:
+        store.refresh(tickers)
+    levels = compute_indicators(store.load_close(tickers))
+    return {t: levels.get(t, dict(EMPTY_LEVELS)) for t in tickers}
@@ -0,0 +1,117 @@
+"""Portfolio risk from the stored daily closes: equity curve, volatility, drawdown, beta, correlation, VaR."""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK = "VOO"
+TRADING_DAYS = 252
+VAR_LEVELS = (0.95, 0.99)
+RISK_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class RiskReport:
+    equity: pd.Series        # today's holdings replayed over the stored window, ending at today's value
+    positions: pd.DataFrame  # ticker -> Weight / Volatility / Beta
+    corr: pd.DataFrame
+    volatility: float        # annualized
+    max_drawdown: float
+    var: dict                # confidence -> 1-day historical VaR in USD
+    beta: float
+    bars: int
+
+
+def returns_matrix(close):
+    # Date-aligned simple returns; gaps inside a series are carried, days before a listing stay NaN
+    values = close.sort_index().ffill().to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = values[1:] / values[:-1] - 1
+    return pd.DataFrame(returns, index=close.index[1:], columns=close.columns)
+
+
+def betas(returns, bench):
+    # cov(r_i, bench) / var(bench) per column, each over the days both series exist
+    both = ~np.isnan(returns) & ~np.isnan(bench)[:, None]
+    n = both.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_mean = np.where(both, returns, 0).sum(axis=0) / n
+        b_mean = np.where(both, bench[:, None], 0).sum(axis=0) / n
+        r_dev, b_dev = returns - r_mean, bench[:, None] - b_mean
+        cov = np.where(both, r_dev * b_dev, 0).sum(axis=0)
+        var = np.where(both, b_dev * b_dev, 0).sum(axis=0)
+        return np.where((n > 1) & (var > 0), cov / var, np.nan)
+
+
+def compute_risk(close, quantities, benchmark=BENCHMARK):
+    held = [t for t in quantities if t in close and quantities[t] > 0]
+    if not held or len(close) < 3:
+        return None
+    returns = returns_matrix(close)
+    last = close[held].ffill().iloc[-1].to_numpy(dtype=float)
+    value = np.nan_to_num(last * np.array([quantities[t] for t in held]))
+    if value.sum() <= 0:
+        return None
+    weights = value / value.sum()
+
+    r = returns[held].to_numpy()
+    live = ~np.isnan(r)
+    # Weights renormalized over the positions that existed that day
+    cover = (live * weights).sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        port = np.where(cover > 0, np.nansum(r * weights, axis=1) / cover, np.nan)
+    keep = ~np.isnan(port)
+    port, dates = port[keep], returns.index[keep]
+    if len(port) < 2:
+        return None
+
+    growth = np.cumprod(1 + port)
+    equity = pd.Series(value.sum() * growth / growth[-1], index=dates, name="Equity")
+    drawdown = 1 - (equity / equity.cummax()).min()
+
+    bench = returns[benchmark].to_numpy()[keep] if benchmark in returns else np.full(len(port), np.nan)
+    positions = pd.DataFrame({
+        "Weight": weights,
+        "Volatility": np.nanstd(r, axis=0, ddof=1) * np.sqrt(TRADING_DAYS),
+        "Beta": betas(r[keep], bench),
+    }, index=held)
+
+    return RiskReport(
+        equity=equity, positions=positions, corr=returns[held].corr(),
+        volatility=float(port.std(ddof=1) * np.sqrt(TRADING_DAYS)), max_drawdown=float(drawdown),
+        var={c: float(max(-np.quantile(port, 1 - c), 0.0) * value.sum()) for c in VAR_LEVELS},
+        beta=float(betas(port[:, None], bench)[0]), bars=len(port),
+    )
+
+
+class RiskEngine:
+    # Reports are materialized per (holdings, last stored bar of every series): only a trade or a new bar recomputes
+    def __init__(self, closes, benchmark=BENCHMARK, size=RISK_CACHE_SIZE):
+        self.closes = closes  # ColumnarStore: no network, evicted columns come back from SQLite
+        self.benchmark = benchmark
+        self.size = size
+        self.computed = self.hits = 0
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def report(self, positions):
+        quantities = {}
+        for p in positions:
+            quantities[p['Ticker']] = quantities.get(p['Ticker'], 0.0) + float(p['Qty'])
+        tickers = sorted(set(quantities) | {self.benchmark})
+        key = (tuple(sorted(quantities.items())), self.closes.last_bars(tickers))
+        with self._lock:
+            if key in self._reports:
+                self._reports.move_to_end(key)
+                self.hits += 1
+                return self._reports[key]
+
+        report = compute_risk(self.closes.frame(tickers), quantities, self.benchmark)
+        with self._lock:
+            self.computed += 1
+            self._reports[key] = report
+            while len(self._reports) > self.size:
+                self._reports.popitem(last=False)
+        return report
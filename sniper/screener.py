@@ -0,0 +1,74 @@
+"""Universe screener: the Sniper signal rules over whole universes, kept as an incremental index."""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .indicators import EMPTY_LEVELS
+from .signals import PRB_TIERS, build_watchlist_frame, market_frame
+
+SIGNAL_NAMES = ["IN ZONE", "ALERT", "Wait", "PROFIT", "No Data"]
+RANKS = {"Diff S1": True, "Upside": False}  # rank column -> ascending (best candidates first)
+
+
+def parse_tickers(text):
+    # "AAPL, msft\nNVDA" -> ["AAPL", "MSFT", "NVDA"], order kept, duplicates dropped
+    return list(dict.fromkeys(t.upper() for t in re.split(r"[\s,;]+", text) if t))
+
+
+class SignalIndex:
+    # Watchlist-style rows for every symbol seen; update() rebuilds only rows whose levels moved
+    def __init__(self, tiers=PRB_TIERS):
+        self.tiers = tiers
+        self.levels = pd.DataFrame()  # ticker -> the EMPTY_LEVELS fields each row was built from
+        self.rows = pd.DataFrame()
+        self.updates = self.rebuilt = 0
+        self._lock = threading.Lock()
+
+    def update(self, market_data):
+        new = market_frame(market_data)
+        with self._lock:
+            if self.levels.empty:
+                changed = new.index.tolist()
+            else:
+                old = self.levels.reindex(new.index)
+                same = ((old == new) | (old.isna() & new.isna())).all(axis=1)
+                changed = new.index[~same.to_numpy()].tolist()
+            if changed:
+                rows = build_watchlist_frame(changed, new, self.tiers).set_index("Ticker", drop=False).rename_axis(None)
+                rows["Signal Name"] = rows["Display Signal"].str.split(" ", n=1).str[1]
+                self.rows = _replace_rows(self.rows, rows)
+                self.levels = _replace_rows(self.levels, new.loc[changed, list(EMPTY_LEVELS)])
+            self.updates += 1
+            self.rebuilt += len(changed)
+        return changed
+
+    def scan(self, tickers=None, tiers=None, signals=None, rank_by="Diff S1", top=None):
+        with self._lock:
+            df = self.rows
+        if df.empty:
+            return df
+        # "No Data" rows only show up when asked for; otherwise they would rank as noise
+        mask = (df["Signal Name"] != "No Data").to_numpy(copy=True) if not signals else np.ones(len(df), dtype=bool)
+        if tickers is not None:
+            mask &= df.index.isin(tickers)
+        if tiers:
+            mask &= df["Tier"].isin(tiers).to_numpy()
+        if signals:
+            mask &= df["Signal Name"].isin(signals).to_numpy()
+        df = df[mask]
+        if top:
+            df = df.nsmallest(top, rank_by) if RANKS[rank_by] else df.nlargest(top, rank_by)
+        else:
+            df = df.sort_values(rank_by, ascending=RANKS[rank_by], kind="stable")
+        return df.reset_index(drop=True)
+
+    def stats(self):
+        return {"symbols": len(self.rows), "updates": self.updates, "rebuilt": self.rebuilt}
+
+
+def _replace_rows(df, rows):
+    if df.empty:
+        return rows
+    return pd.concat([df.drop(index=rows.index, errors="ignore"), rows])
@@ -0,0 +1,127 @@
+"""Shared market-data service: single-flight fetches and the background refresher."""
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from .indicators import EMPTY_LEVELS
+from .pipeline import fetch_market_data
+
+
+# session ที่ขอ ticker ซ้ำกันพร้อมกัน จะรอผลจากการดึงครั้งเดียว (single-flight)
+class MarketDataService:
+    def __init__(self, levels, cache):
+        self.levels = levels
+        self.cache = cache
+        self._inflight = {}  # ticker -> Future of the fetch currently covering it
+        self._lock = threading.Lock()
+        self.fetches = 0            # upstream batches actually started
+        self.coalesced = 0          # requests that waited on someone else's fetch
+        self.coalesced_symbols = 0
+
+    def get(self, tickers, force=False):
+        # force=True skips the cache lookup (background revalidation) but still joins in-flight fetches
+        with self._lock:
+            if force:
+                data_dict, missing = {}, list(tickers)
+            else:
+                data_dict, missing = self.cache.lookup(tickers)
+            own = [t for t in missing if t not in self._inflight]
+            shared = {t: self._inflight[t] for t in missing if t in self._inflight}
+            if own:
+                future = Future()
+                self._inflight.update(dict.fromkeys(own, future))
+                self.fetches += 1
+            if shared:
+                self.coalesced += 1
+                self.coalesced_symbols += len(shared)
+
+        if own:
+            try:
+                fetched = fetch_market_data(self.levels, own)
+                self.cache.put_many(fetched)
+                future.set_result(fetched)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    for t in own:
+                        if self._inflight.get(t) is future:
+                            del self._inflight[t]
+            data_dict.update(fetched)
+
+        for t, pending in shared.items():
+            data_dict[t] = pending.result().get(t, dict(EMPTY_LEVELS))
+        return data_dict
+
+    def stats(self):
+        return {"fetches": self.fetches, "coalesced": self.coalesced, "coalesced_symbols": self.coalesced_symbols}
+
+
+# รีเฟรชข้อมูลเบื้องหลัง หน้าเว็บอ่าน snapshot ล่าสุดได้ทันที
+REFRESH_INTERVAL = int(os.environ.get("SNIPER_REFRESH_SECONDS", "60"))
+SESSION_IDLE_SECONDS = 15 * 60
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    data: MappingProxyType   # ticker -> read-only record
+    fetched_at: float        # epoch seconds, 0 = never
+    version: int
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class MarketDataRefresher:
+    # Refreshes the union of every live session's tickers and publishes immutable snapshots
+    def __init__(self, fetch, interval=REFRESH_INTERVAL):
+        self.fetch = fetch  # MarketDataService.get
+        self.interval = interval
+        self._sessions = {}  # session id -> (last seen, tickers)
+        self._snapshot = MarketSnapshot(MappingProxyType({}), 0.0, 0)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name="market-data-refresher", daemon=True).start()
+
+    def register(self, session_id, tickers):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), tuple(tickers))
+
+    def tickers(self):
+        cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+        with self._lock:
+            self._sessions = {k: v for k, v in self._sessions.items() if v[0] >= cutoff}
+            return sorted({t for _, tickers in self._sessions.values() for t in tickers})
+
+    def snapshot(self):
+        return self._snapshot
+
+    def revalidate(self):
+        # Non-blocking: wake the worker, readers keep the current snapshot meanwhile
+        self._wake.set()
+
+    def refresh(self, tickers, force=False, replace=False):
+        records = self.fetch(tickers, force)
+        with self._lock:
+            data = {} if replace else dict(self._snapshot.data)
+            data.update({t: MappingProxyType(dict(r)) for t, r in records.items()})
+            fetched_at = time.time() if replace or not self._snapshot.fetched_at else self._snapshot.fetched_at
+            self._snapshot = MarketSnapshot(MappingProxyType(data), fetched_at, self._snapshot.version + 1)
+            return self._snapshot
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            tickers = self.tickers()
+            if not tickers:
+                continue
+            try:
+                self.refresh(tickers, force=True, replace=True)
+            except Exception:
+                pass  # keep serving the last snapshot
@@ -0,0 +1,94 @@
+"""Valuation and Sniper signals over market data, vectorized per column."""
+import numpy as np
+import pandas as pd
+
+from .indicators import EMPTY_LEVELS
+
+PRB_TIERS = {
+    "NVDA": "S+", "AAPL": "S+", "MSFT": "S+", "GOOGL": "S+", "TSM": "S+", "ASML": "S+",
+    "AMD": "S", "PLTR": "S", "AMZN": "S", "META": "S", "AVGO": "S", "CRWD": "S", "SMH": "S", "QQQ": "ETF",
+    "TSLA": "A+", "V": "A+", "MA": "A+", "LLY": "A+", "JNJ": "A+", "BRK.B": "A+", "PG": "B+", "KO": "B+",
+    "NFLX": "A", "WM": "A", "WMT": "A", "CEG": "A", "NET": "A", "PANW": "A", "SCHD": "A", "CDNS": "S",
+    "ISRG": "B+", "RKLB": "B+", "TMDX": "B+", "IREN": "B+", "MELI": "B+", "ASTS": "B+", "EOSE": "B+",
+    "ADBE": "B", "UBER": "B", "HOOD": "B", "DASH": "B", "BABA": "B", "CRWV": "B", "MU": "B", "PATH": "C",
+    "TTD": "C", "LULU": "C", "CMG": "C", "DUOL": "C", "PDD": "C", "ORCL": "C", "WBD": "Hold",
+    "VOO": "ETF", "QQQM": "ETF"
+}
+
+
+def market_frame(market_data):
+    # Market data as one frame indexed by ticker, joined onto positions/watchlist with a single merge
+    return pd.DataFrame([dict(r) for r in market_data.values()], index=list(market_data), columns=list(EMPTY_LEVELS))
+
+
+def join_market(df, market_df):
+    df = df.merge(market_df, left_on='Ticker', right_index=True, how='left', indicator=True)
+    unmatched = (df.pop('_merge') == 'left_only').to_numpy()
+    df.loc[unmatched, list(EMPTY_LEVELS)] = list(EMPTY_LEVELS.values())
+    return df
+
+
+def safe_ratio(num, den, default):
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    return np.divide(num, den, out=np.full(num.shape, float(default)), where=den > 0)
+
+
+def classify_signals(price, diff_s1, sell1, alert_band=0.02):
+    # No price = EMPTY_LEVELS (no quote or < MIN_BARS of history): its own signal, never PROFIT (0 >= Sell1 0)
+    price, diff_s1, sell1 = (np.asarray(x, dtype=float) for x in (price, diff_s1, sell1))
+    return np.select(
+        [~(price > 0), diff_s1 < 0, diff_s1 <= alert_band, price >= sell1],
+        ["6. ⚪ No Data", "1. ✅ IN ZONE", "2. 🟢 ALERT", "5. 🔴 PROFIT"], default="3. ➖ Wait",
+    )
+
+
+def build_portfolio_frame(positions, market_df):
+    df = pd.DataFrame(positions)
+    if df.empty:
+        return df
+    m = join_market(df[['Ticker']], market_df)
+    price, prev, buy1, sell1 = m['Price'], m['PrevClose'], m['EMA50'], m['Sell1']
+
+    df['Current Price'] = price
+    df['PrevClose'] = prev
+    df['Value USD'] = df['Qty'] * price
+    df['Total Cost'] = df['Qty'] * df['Avg Cost']
+    df['Total Gain USD'] = df['Value USD'] - df['Total Cost']
+    df['% P/L'] = ((price - df['Avg Cost']) / df['Avg Cost'])
+    df['Day Change USD'] = (price - prev) * df['Qty']
+    df['%Day Change'] = ((price - prev) / prev) if prev.sum() > 0 else 0
+    df['Buy Lv.1'] = buy1
+    df['Buy Lv.2'] = m['EMA200']
+    df['Sell Lv.1'] = sell1
+    df['Sell Lv.2'] = m['Sell2']
+    df['Diff S1'] = safe_ratio(price - buy1, buy1, 0)
+    df['Upside'] = safe_ratio(sell1 - price, price, 0)
+    return df
+
+
+def build_watchlist_frame(watchlist, market_df, tiers=PRB_TIERS):
+    tickers = sorted(set(watchlist))
+    if not tickers:
+        return pd.DataFrame()
+    m = join_market(pd.DataFrame({'Ticker': tickers}), market_df)
+    price, prev, buy1, sell1 = m['Price'], m['PrevClose'], m['EMA50'], m['Sell1']
+    diff_s1 = safe_ratio(price - buy1, buy1, 9.99)
+    signal = classify_signals(price, diff_s1, sell1)
+    return pd.DataFrame({
+        "Tier": m['Ticker'].map(tiers).fillna("-"), "Ticker": m['Ticker'], "Price": price,
+        "% Day": safe_ratio(price - prev, prev, 0), "Signal": signal,
+        "Diff S1": diff_s1, "RSI": m['RSI'], "Upside": safe_ratio(sell1 - price, price, 0),
+        "Buy Lv.1": buy1, "Buy Lv.2": m['EMA200'], "Sell Lv.1": sell1, "Sell Lv.2": m['Sell2'],
+        "Display Signal": pd.Series(signal, index=m.index).str.split(". ", n=1, regex=False).str[1],
+    })
+
+
+def portfolio_totals(df, cash=0.0):
+    if df.empty:
+        return {"total_value": cash, "total_gain": 0, "total_day_change": 0, "total_invested": 0}
+    return {
+        "total_value": df['Value USD'].sum() + cash,
+        "total_gain": df['Total Gain USD'].sum(),
+        "total_day_change": df['Day Change USD'].sum(),
+        "total_invested": df['Total Cost'].sum(),
+    }
@@ -0,0 +1,113 @@
+"""On-disk (SQLite) daily OHLCV history, refreshed incrementally."""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .fetch import chunked, split_download, yf_download
+
+# เก็บแท่งราคารายวันไว้ในเครื่อง แล้วดึงเฉพาะแท่งที่ขาด
+HISTORY_DB = os.environ.get(
+    "SNIPER_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sniper_history.sqlite"),
+)
+HISTORY_DAYS = 730       # same depth as period="2y"
+OVERLAP_DAYS = 5         # re-pull the last few bars so restated bars replace the stored ones
+FULL_REFRESH_DAYS = 7    # periodic full backfill picks up dividend/split re-adjustments
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+
+class HistoryStore:
+    def __init__(self, path, download=None):
+        self.path = path
+        self.download = download or yf_download
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS bars (
+                ticker TEXT NOT NULL, date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, date))""")
+            conn.execute("CREATE TABLE IF NOT EXISTS symbols (ticker TEXT PRIMARY KEY, backfilled_at TEXT NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def last_dates(self, tickers):
+        known = {}
+        with self._connect() as conn:
+            for chunk in chunked(tickers, 500):
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT b.ticker, MAX(b.date), s.backfilled_at FROM bars b "
+                    f"JOIN symbols s ON s.ticker = b.ticker WHERE b.ticker IN ({marks}) GROUP BY b.ticker",
+                    chunk,
+                ).fetchall()
+                known.update({t: (date.fromisoformat(last), date.fromisoformat(filled)) for t, last, filled in rows})
+        return known
+
+    def refresh(self, tickers, today=None):
+        # Cold symbols get one 2y backfill, warm ones only the bars after their last stored date
+        today = today or date.today()
+        known = self.last_dates(tickers)
+        cold, starts = [], {}
+        for t in tickers:
+            if t not in known or known[t][1] < today - timedelta(days=FULL_REFRESH_DAYS):
+                cold.append(t)
+            else:
+                start = known[t][0] - timedelta(days=OVERLAP_DAYS)
+                starts.setdefault(start, []).append(t)
+
+        ingested = set()
+        if cold:
+            ingested |= self._ingest(cold, full=True, period="2y")
+        for start, group in starts.items():
+            ingested |= self._ingest(group, full=False, start=start.isoformat())
+
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM bars WHERE date < ?", ((today - timedelta(days=HISTORY_DAYS)).isoformat(),))
+        return ingested
+
+    def _ingest(self, tickers, full, **kwargs):
+        df_hist = self.download(tickers, group_by='ticker', auto_adjust=True, threads=True, progress=False, **kwargs)
+        stamp = date.today().isoformat()
+        ingested = set()
+        with self._lock, self._connect() as conn:
+            for t, df_t in split_download(df_hist, tickers).items():
+                df_t = df_t.reindex(columns=BAR_FIELDS).astype(float).dropna(subset=["Close"])
+                if df_t.empty:
+                    continue
+                ingested.add(t)
+                if full:
+                    conn.execute("DELETE FROM bars WHERE ticker = ?", (t,))
+                    conn.execute("INSERT OR REPLACE INTO symbols VALUES (?, ?)", (t, stamp))
+                # INSERT OR REPLACE on (ticker, date) = merge + dedupe of restated bars
+                conn.executemany(
+                    "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(t, d.strftime("%Y-%m-%d"), *row) for d, row in zip(df_t.index, df_t.itertuples(index=False, name=None))],
+                )
+        return ingested
+
+    def load_close(self, tickers):
+        # Wide date x ticker Close matrix - the only field the indicators need
+        parts = []
+        with self._connect() as conn:
+            for chunk in chunked(tickers, 500):
+                marks = ",".join("?" * len(chunk))
+                parts.append(pd.read_sql_query(
+                    f"SELECT ticker, date, close FROM bars WHERE ticker IN ({marks})",
+                    conn, params=chunk, parse_dates=["date"],
+                ))
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        if df.empty:
+            return pd.DataFrame()
+        return df.pivot(index="date", columns="ticker", values="close").sort_index()
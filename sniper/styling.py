@@ -0,0 +1,124 @@
+"""Table views for st.dataframe: vectorized status columns + native column formats.
+
+No pandas Styler: every marker is computed column-wise with numpy and the numbers are formatted by
+the browser through st.column_config, so the cost of a table is one arrow frame, not one callback +
+one inline CSS rule per cell.
+"""
+import numpy as np
+
+WATCH_PAGE_SIZE = 50    # watchlists longer than this get server-side filter / sort / pages
+TIER_BADGES = {"S+": "🥇 S+", "S": "🥈 S"}
+
+PORTFOLIO_COLUMNS = ["Ticker", "Qty", "Avg Cost", "Current Price", "% P/L", "Trend", "Value USD", "Total Gain USD", "Upside", "Zone", "Diff S1", "Buy Lv.1", "Sell Lv.1"]
+WATCHLIST_COLUMNS = ["Display Signal", "Tier", "Ticker", "Price", "% Day", "Trend", "Upside", "Diff S1", "RSI", "RSI Zone", "Buy Lv.1", "Buy Lv.2", "Sell Lv.1", "Sell Lv.2"]
+WATCH_SORTS = {
+    "Signal": (["Signal", "Diff S1"], True), "Diff S1": (["Diff S1"], True), "Upside": (["Upside"], False),
+    "% Day": (["% Day"], False), "RSI": (["RSI"], True), "Ticker": (["Ticker"], True),
+}
+
+
+# --- Vectorized status markers (เดิมคือสีจาก Styler callbacks) ---
+def trend_arrow(pct):
+    return np.select([pct > 0, pct < 0], ["⬆️", "⬇️"], "➖")
+
+
+def diff_zone(diff_s1):
+    # ตรงกับสีเดิมของ Diff S1: < 0 เขียวเข้ม, 0..+2% เขียวอ่อน, > +2% แดง
+    return np.select([diff_s1 < 0, diff_s1 <= 0.02], ["✅", "🟢"], "🔴")
+
+
+def rsi_zone(rsi):
+    return np.select([rsi >= 70, rsi <= 30], ["🔴 OB", "🟢 OS"], "")
+
+
+def tier_badge(tier):
+    badge = tier.map(TIER_BADGES)
+    return badge.where(badge.notna(), np.where(tier.str.contains("A", regex=False), "🥉 " + tier, tier))
+
+
+def as_percent(s):
+    # Fractions -> percent points so NumberColumn can print "%+.1f%%"
+    return s * 100
+
+
+def portfolio_view(df):
+    view = df.assign(
+        **{"% P/L": as_percent(df["% P/L"]), "Diff S1": as_percent(df["Diff S1"]), "Upside": as_percent(df["Upside"])},
+        Trend=trend_arrow(df["% P/L"]), Zone=diff_zone(df["Diff S1"]),
+    )
+    return view[PORTFOLIO_COLUMNS]
+
+
+def watchlist_view(df):
+    view = df.assign(
+        **{"% Day": as_percent(df["% Day"]), "Diff S1": as_percent(df["Diff S1"]), "Upside": as_percent(df["Upside"])},
+        Tier=tier_badge(df["Tier"]), Trend=trend_arrow(df["% Day"]), **{"RSI Zone": rsi_zone(df["RSI"])},
+    )
+    return view[WATCHLIST_COLUMNS]
+
+
+# --- Server-side filter / sort / page for large watchlists ---
+def filter_watchlist(df, query="", signals=None):
+    mask = np.ones(len(df), dtype=bool)
+    if query:
+        mask &= df["Ticker"].str.contains(query.strip().upper(), regex=False).to_numpy()
+    if signals:
+        mask &= df["Display Signal"].isin(signals).to_numpy()
+    return df[mask]
+
+
+def sort_watchlist(df, by="Signal"):
+    columns, ascending = WATCH_SORTS[by]
+    return df.sort_values(by=columns, ascending=ascending, kind="stable")
+
+
+def page_count(rows, page_size=WATCH_PAGE_SIZE):
+    return max(1, -(-rows // page_size))
+
+
+def page_slice(df, page, page_size=WATCH_PAGE_SIZE):
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+# --- Native column config (shared by the Growth / Defensive tables) ---
+def portfolio_column_config():
+    import streamlit as st
+
+    pct = "%+.1f%%"
+    return {
+        "Qty": st.column_config.NumberColumn("Qty", format="%.4f"),
+        "Avg Cost": st.column_config.NumberColumn("Avg Cost", format="$%.2f"),
+        "Current Price": st.column_config.NumberColumn("Price", format="$%.2f"),
+        "% P/L": st.column_config.NumberColumn("% Total", format="%+.2f%%"),
+        "Trend": st.column_config.TextColumn("", width="small"),
+        "Value USD": st.column_config.NumberColumn("Value ($)", format="dollar"),
+        "Total Gain USD": st.column_config.NumberColumn("Total Gain ($)", format="dollar"),
+        "Upside": st.column_config.NumberColumn("Upside", format=pct, help="Gap to Sell Lv.1"),
+        "Zone": st.column_config.TextColumn("", width="small", help="✅ IN ZONE / 🟢 ALERT / 🔴 Wait"),
+        "Diff S1": st.column_config.NumberColumn("Diff S1", format=pct),
+        "Buy Lv.1": st.column_config.NumberColumn("Buy Lv.1", format="$%.0f"),
+        "Sell Lv.1": st.column_config.NumberColumn("Sell Lv.1", format="$%.0f"),
+    }
+
+
+def watchlist_column_config():
+    import streamlit as st
+
+    pct, level = "%+.1f%%", "$%.0f"
+    return {
+        "Display Signal": st.column_config.TextColumn("Status", width="medium"),
+        "Tier": st.column_config.TextColumn("Tier", width="small"),
+        "Ticker": st.column_config.TextColumn("Symbol", width="small"),
+        "Price": st.column_config.NumberColumn("Price", format="$%.2f", width="small"),
+        "% Day": st.column_config.NumberColumn("% Day", format="%+.2f%%", width="small"),
+        "Trend": st.column_config.TextColumn("", width="small"),
+        "Diff S1": st.column_config.NumberColumn("Diff S1", format=pct, help="Distance to EMA 50"),
+        "Upside": st.column_config.NumberColumn("Upside", format=pct, help="Gap to Sell Lv.1"),
+        "RSI": st.column_config.NumberColumn("RSI", format="%.0f", help="RSI (14)"),
+        "RSI Zone": st.column_config.TextColumn("", width="small", help="🟢 Oversold (≤30) / 🔴 Overbought (≥70)"),
+        "Buy Lv.1": st.column_config.NumberColumn("Buy (EMA50)", format=level),
+        "Buy Lv.2": st.column_config.NumberColumn("Buy (EMA200)", format=level),
+        "Sell Lv.1": st.column_config.NumberColumn("Sell (R1)", format=level),
+        "Sell Lv.2": st.column_config.NumberColumn("Sell (R2)", format=level),
+    }
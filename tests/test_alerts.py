@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from bench.fixtures import FixtureDownloader, synthetic_bars
+from sniper.alerts import AlertDaemon, TransitionTracker
+from sniper.pipeline import DailyLevels
+from sniper.store import HistoryStore
+
+TICKERS = ["AAA", "BBB", "NEW"]
+
+
+class ListSink:
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alerts):
+        self.alerts += alerts
+
+
+@pytest.fixture
+def bars():
+    bars = synthetic_bars(TICKERS, days=400, seed=3)
+    bars["NEW"] = bars["NEW"].iloc[-50:]  # quotes, but fewer than MIN_BARS stored bars
+    return bars
+
+
+@pytest.fixture
+def levels(tmp_path, bars):
+    return DailyLevels(HistoryStore(str(tmp_path / "history.sqlite"), download=FixtureDownloader(bars)))
+
+
+def flipping_source(bars, delay=0.0):
+    # AAA alternates between its last close and half of it (deep IN ZONE) on every fetch
+    today = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+    calls = []
+
+    def source(tickers):
+        time.sleep(delay)
+        calls.append(len(calls))
+        factor = 0.5 if len(calls) % 2 else 1.0
+        return {t: (today, float(bars[t]["Close"].iloc[-1]) * (factor if t == "AAA" else 1.0)) for t in tickers}
+    return source
+
+
+def test_source_slower_than_budget_still_alerts(levels, bars):
+    sink = ListSink()
+    daemon = AlertDaemon({t: {"acct"} for t in TICKERS}, flipping_source(bars, delay=0.15), levels, [sink],
+                         interval=0.25, budget=0.1, tracker=TransitionTracker(cooldown=0))
+    levels.ensure(TICKERS)
+    asyncio.run(daemon.run(cycles=6))
+    assert daemon.late >= 4
+    assert {"AAA", "BBB"} <= set(daemon.tracker.last)
+    assert sink.alerts and {a["ticker"] for a in sink.alerts} == {"AAA"}
+
+
+def test_symbols_without_levels_are_no_data(levels, bars):
+    sink = ListSink()
+    daemon = AlertDaemon({t: {"acct"} for t in TICKERS}, flipping_source(bars), levels, [sink],
+                         interval=0, tracker=TransitionTracker(("IN ZONE", "PROFIT", "Wait"), cooldown=0))
+    asyncio.run(daemon.run(cycles=3))
+    assert daemon.tracker.last["NEW"] == "No Data"
+    assert "NEW" not in {a["ticker"] for a in sink.alerts}
@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench.fixtures import synthetic_bars
+from sniper.backtest import GRID, LIVE_PARAMS, param_grid, run_backtest
+
+GRID_SMALL = {
+    "span": [20, 50], "band": [0.0, 0.05], "mult": [0.5, 2.0],
+    "rsi_low": [-np.inf, 35], "rsi_high": [np.inf, 65],
+}
+
+
+@pytest.fixture(scope="module")
+def close():
+    bars = synthetic_bars([f"T{i:02d}" for i in range(6)], days=320, seed=5)
+    close = pd.DataFrame({t: b["Close"] for t, b in bars.items()})
+    close.iloc[:120, 2] = np.nan  # a symbol that listed later
+    return close
+
+
+def reference(series, span, band, mult, rsi_low, rsi_high):
+    # Bar-by-bar replay of the same rules, one ticker at a time
+    s = series.dropna().to_numpy()
+    ema = pd.Series(s).ewm(span=span, adjust=False).mean().to_numpy()
+    delta = pd.Series(s).diff()
+    gain = delta.clip(lower=0).rolling(14).mean().to_numpy()
+    loss = (-delta.clip(upper=0)).rolling(14).mean().to_numpy()
+    ma, sd = pd.Series(s).rolling(20).mean().to_numpy(), pd.Series(s).rolling(20).std().to_numpy()
+
+    held, pos = [False], False  # decided at the close, held from the next bar
+    for i in range(len(s) - 1):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + gain[i] / loss[i])
+        ready = i + 1 > max(span, 20, 14)
+        enter = ready and ((s[i] - ema[i]) / ema[i] <= band or rsi <= rsi_low)
+        leave = ready and (s[i] >= ma[i] + mult * sd[i] or rsi >= rsi_high)
+        pos = True if enter else (False if leave else pos)  # IN ZONE / ALERT beat PROFIT
+        held.append(pos)
+
+    equity, peak, drawdown, trades, wins, trade = 1.0, 1.0, 0.0, 0, 0, None
+    for i in range(1, len(s)):
+        if held[i] and not held[i - 1]:
+            trades, trade = trades + 1, 1.0
+        if held[i]:
+            step = s[i] / s[i - 1]
+            equity, trade = equity * step, trade * step
+            peak = max(peak, equity)
+            drawdown = max(drawdown, 1 - equity / peak)
+        if held[i] and (i == len(s) - 1 or not held[i + 1]):
+            wins += trade > 1
+    return {"trades": trades, "wins": wins, "total_return": equity - 1, "max_drawdown": drawdown}
+
+
+def test_matches_bar_by_bar_reference(close):
+    result = run_backtest(close, GRID_SMALL, workers=1)
+    for combo, p in result.params.iterrows():
+        for t in close.columns:
+            expected = reference(close[t], int(p["span"]), p["band"], p["mult"], p["rsi_low"], p["rsi_high"])
+            row = result.per_ticker.loc[(combo, t)]
+            assert (row["trades"], row["wins"]) == (expected["trades"], expected["wins"]), (combo, t)
+            assert row["total_return"] == pytest.approx(expected["total_return"], rel=1e-9, abs=1e-12), (combo, t)
+            assert row["max_drawdown"] == pytest.approx(expected["max_drawdown"], rel=1e-9, abs=1e-12), (combo, t)
+
+
+def test_process_pool_matches_inline(close):
+    inline = run_backtest(close, GRID_SMALL, workers=1)
+    pooled = run_backtest(close, GRID_SMALL, workers=2)
+    pd.testing.assert_frame_equal(inline.per_ticker, pooled.per_ticker)
+
+
+def test_live_params_are_in_the_default_grid():
+    params = param_grid()
+    assert len(params) == math.prod(len(v) for v in GRID.values())
+    live = np.ones(len(params), dtype=bool)
+    for axis, value in LIVE_PARAMS.items():
+        live &= (params[axis] == value).to_numpy()
+    assert live.sum() == 1
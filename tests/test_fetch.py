@@ -0,0 +1,50 @@
+from bench.fixtures import FixtureDownloader, synthetic_bars
+from sniper.fetch import ChunkedFetcher
+
+
+def fetcher(download, **kwargs):
+    sleeps = []
+    f = ChunkedFetcher(download, rate=1e9, sleep=sleeps.append, **kwargs)
+    return f, sleeps
+
+
+def test_throttled_chunks_do_not_open_breakers():
+    def throttled(tickers, **kwargs):
+        raise RuntimeError("429 Too Many Requests")
+
+    f, sleeps = fetcher(throttled)
+    for _ in range(3):
+        assert f.download(["AAPL", "MSFT", "NVDA"], period="5d").empty
+    assert f.breaker.open_symbols() == []
+    assert (f.requests, f.retried, f.throttled) == (9, 6, 3)
+    assert sleeps == [1.0, 2.0] * 3
+
+
+def test_unknown_symbols_open_their_breaker_without_retries():
+    # yfinance answers an unknown ticker with an empty frame instead of raising
+    download = FixtureDownloader(synthetic_bars(["AAPL", "MSFT"], days=10))
+    f, sleeps = fetcher(download)
+    for _ in range(3):
+        assert f.download(["GC=f"], period="5d").empty
+        f.download(["AAPL", "MSFT", "GC=X"], period="5d")
+    assert f.breaker.open_symbols() == ["GC=X", "GC=f"]
+    assert (f.requests, f.retried, f.throttled, sleeps) == (6, 0, 0, [])
+
+    calls = download.calls
+    got = f.download(["AAPL", "GC=f"], period="5d")
+    assert list(got.columns.get_level_values(0).unique()) == ["AAPL"]
+    assert download.calls == calls + 1
+
+
+def test_single_symbol_errors_count_against_the_symbol():
+    def broken(tickers, **kwargs):
+        raise ValueError("no timezone found")
+
+    f, _ = fetcher(broken)
+    for _ in range(3):
+        f.download(["BAD"], period="5d")
+    assert f.breaker.open_symbols() == ["BAD"]
+    assert f.throttled == 0
+    requests = f.requests
+    assert f.download(["BAD"], period="5d").empty
+    assert f.requests == requests  # skipped while the breaker is open
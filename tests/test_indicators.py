@@ -0,0 +1,49 @@
+import pytest
+
+from bench.fixtures import FixtureDownloader, synthetic_bars
+from sniper.indicators import IndicatorState, compute_indicators
+from sniper.pipeline import DailyLevels, fetch_quotes
+from sniper.store import HistoryStore
+
+TICKERS = ["AAA", "BBB", "CCC"]
+FIELDS = ["Price", "PrevClose", "EMA50", "EMA200", "RSI", "Sell1", "Sell2"]
+
+
+def assert_levels(got, expected, rtol=1e-4):
+    for field in FIELDS:
+        assert got[field] == pytest.approx(expected[field], rel=rtol), field
+
+
+@pytest.fixture
+def levels(tmp_path):
+    download = FixtureDownloader(synthetic_bars(TICKERS, days=400))
+    return DailyLevels(HistoryStore(str(tmp_path / "history.sqlite"), download=download))
+
+
+def test_state_peek_matches_batch():
+    close = synthetic_bars(["AAA"], days=300)["AAA"]["Close"]
+    state = IndicatorState()
+    for bar_date, c in close.iloc[:-1].items():
+        state.update(float(c), bar_date)
+    assert_levels(state.peek(float(close.iloc[-1])), compute_indicators(close.to_frame("AAA"))["AAA"], rtol=1e-9)
+
+
+def test_refresh_path_peeks_streaming_state(levels):
+    # The live refresh goes through the book: a new tick is a peek, not a recompute of the history
+    levels.ensure(TICKERS)
+    quotes = fetch_quotes(TICKERS, download=levels.store.download)
+    records = levels.combine(quotes, TICKERS)
+    close = levels.store.load_close(TICKERS)
+    expected = compute_indicators(close)
+    for t in TICKERS:
+        assert_levels(records[t], expected[t])
+
+    day = next(iter(quotes.values()))[0]
+    ticked = {t: (d, p * 1.03) for t, (d, p) in quotes.items()}
+    assert levels.book.stale(TICKERS, before=day) == []
+    records = levels.combine(ticked, TICKERS)
+
+    close.loc[day] = [ticked[t][1] for t in close.columns]
+    expected = compute_indicators(close)
+    for t in TICKERS:
+        assert_levels(records[t], expected[t])
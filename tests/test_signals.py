@@ -0,0 +1,19 @@
+import pandas as pd
+
+from sniper.indicators import EMPTY_LEVELS
+from sniper.signals import build_watchlist_frame, classify_signals
+
+
+def test_classify_signals():
+    price = [90.0, 101.0, 120.0, 130.0, 0.0]
+    diff_s1 = [-0.1, 0.01, 0.2, 0.3, 9.99]
+    sell1 = [150.0, 150.0, 150.0, 125.0, 0.0]
+    assert list(classify_signals(price, diff_s1, sell1)) == [
+        "1. ✅ IN ZONE", "2. 🟢 ALERT", "3. ➖ Wait", "5. 🔴 PROFIT", "6. ⚪ No Data",
+    ]
+
+
+def test_symbols_without_data_are_not_profit():
+    market_df = pd.DataFrame.from_dict({"ZZZ": dict(EMPTY_LEVELS)}, orient="index")
+    rows = build_watchlist_frame(["ZZZ", "QQQ"], market_df)
+    assert rows["Display Signal"].tolist() == ["⚪ No Data", "⚪ No Data"]